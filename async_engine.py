@@ -0,0 +1,354 @@
+"""
+Asyncio engine for the exporter.
+
+The GET requests to the BMCs are sent by one aiohttp client on the event loop of
+the ASGI server. The collectors keep their synchronous interface, so the scrapes
+are not asynchronous themselves: every scrape runs on one of async_workers worker
+threads for its whole duration and blocks it while it waits for the event loop.
+At most async_workers targets are scraped at the same time. Session logins and
+logouts are sent with requests from the worker thread. The members of a
+collection are requested concurrently on the loop, so a scrape never needs more
+than one thread regardless of how many requests are in flight.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import falcon
+import falcon.asgi
+import requests
+from requests.structures import CaseInsensitiveDict
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+
+from collector import REQUEST_HEADERS, RedfishMetricsCollector
+from handler import ExporterMetricsHandler, MetricsHandler, ProbeHandler, WelcomePage
+from exporter_metrics import queued
+from response_cache import RESPONSE_CACHE
+from circuit_breaker import BREAKERS, CLOSED
+from capability_map import CAPABILITIES
+from poller import POLLER
+
+
+class AsyncEngine:
+    """Event loop, HTTP client and worker pool shared by all scrapes."""
+
+    def __init__(self):
+        self.workers = 64
+        self.max_connections = 1000
+        self._loop = None
+        self._client = None
+        self._executor = None
+        self._semaphores = {}
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.workers = int(os.getenv("ASYNC_WORKERS", config.get("async_workers", 64)))
+        self.max_connections = int(config.get("async_max_connections", 1000))
+
+    async def start(self):
+        """Create the HTTP client and worker pool on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=False, limit=self.max_connections),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape")
+        logging.info(
+            "Async engine started, up to %s scrapes run at a time on worker threads "
+            "with up to %s BMC connections on the event loop",
+            self.workers, self.max_connections
+        )
+
+    async def stop(self):
+        """Close the HTTP client and the worker pool."""
+        if self._client:
+            await self._client.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+    async def run_in_worker(self, func, *args):
+        """Run a blocking scrape on the worker pool."""
+        return await self._loop.run_in_executor(self._executor, queued("async", func, *args))
+
+    async def stream_in_worker(self, func, *args):
+        """
+        Run func(*args), which returns an iterator, on the worker pool and return an
+        async iterator of its items. Errors of func itself are raised here, the
+        items are handed over to the event loop as soon as the worker produced them.
+        """
+        items = asyncio.Queue()
+        stopped = threading.Event()
+
+        def put(kind, value=None):
+            self._loop.call_soon_threadsafe(items.put_nowait, (kind, value))
+
+        def produce():
+            try:
+                iterator = iter(func(*args))
+            except Exception as err: # pylint: disable=broad-exception-caught
+                put("failed", err)
+                return
+
+            put("started")
+            try:
+                for item in iterator:
+                    # the client went away
+                    if stopped.is_set():
+                        break
+                    put("item", item)
+            except Exception as err: # pylint: disable=broad-exception-caught
+                put("failed", err)
+            finally:
+                if hasattr(iterator, "close"):
+                    iterator.close()
+                put("done")
+
+        self._loop.run_in_executor(self._executor, queued("async", produce))
+        kind, value = await items.get()
+        if kind == "failed":
+            raise value
+
+        async def iterate():
+            try:
+                while True:
+                    kind, value = await items.get()
+                    if kind == "done":
+                        return
+                    if kind == "failed":
+                        raise value
+                    yield value
+            finally:
+                stopped.set()
+
+        return iterate()
+
+    def run(self, coro):
+        """Run a coroutine on the event loop from a worker thread and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def semaphore(self, target, limit):
+        """Return the semaphore bounding the concurrent requests to one target."""
+        if target not in self._semaphores:
+            self._semaphores[target] = asyncio.Semaphore(limit)
+        return self._semaphores[target]
+
+    async def get(self, url, headers, auth, timeout):
+        """
+        Send a GET request and return it as requests.Response, so that
+        RedfishMetricsCollector.connect_server() can handle it like its own requests.
+        aiohttp errors are raised as the matching requests exceptions.
+        """
+        start = time.monotonic()
+        try:
+            async with self._client.get(
+                url,
+                headers=headers,
+                auth=aiohttp.BasicAuth(*auth) if auth else None,
+                timeout=aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout),
+            ) as result:
+                body = await result.read()
+
+        except aiohttp.ConnectionTimeoutError as err:
+            raise requests.exceptions.ConnectTimeout(err) from err
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as err:
+            raise requests.exceptions.ReadTimeout(err) from err
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as err:
+            raise requests.exceptions.ConnectionError(err) from err
+        except aiohttp.ClientError as err:
+            raise requests.exceptions.RequestException(err) from err
+
+        response = requests.Response()
+        response.status_code = result.status
+        response.reason = result.reason
+        response.headers = CaseInsensitiveDict(result.headers)
+        response.url = url
+        response._content = body # pylint: disable=protected-access
+        response._content_consumed = True # pylint: disable=protected-access
+        response.elapsed = datetime.timedelta(seconds=time.monotonic() - start)
+        return response
+
+
+ASYNC_ENGINE = AsyncEngine()
+
+
+class AsyncRedfishMetricsCollector(RedfishMetricsCollector):
+    """RedfishMetricsCollector which sends its GET requests through the async engine."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prefetched = {}
+
+    def _get(self, url, headers, auth=None):
+        """Send a GET request on the event loop, or take its prefetched response."""
+        response = self._prefetched.pop(url, None)
+        if isinstance(response, Exception):
+            raise response
+
+        # a prefetched 401 was sent with a token that may have been renewed since
+        if response is not None and response.status_code != 401:
+            return response
+
+        return ASYNC_ENGINE.run(self._fetch(url, headers, auth))
+
+    async def _fetch(self, url, headers, auth):
+        request_headers = {
+            key: value for key, value in {**REQUEST_HEADERS, **headers}.items() if value is not None
+        }
+        return await ASYNC_ENGINE.get(url, request_headers, auth, self._request_timeout())
+
+    def connect_many(self, commands):
+        """
+        Send the requests for all URLs concurrently on the event loop, then let
+        connect_server() handle the responses in the order of the URLs.
+        """
+        commands = list(commands)
+        # responses of this scrape and missing resources are answered by connect_server()
+        # without a request
+        missing = [
+            command for command in commands
+            if not self._memo.get(command)
+            and not (self._capabilities and CAPABILITIES.peek(self.target, command))
+        ]
+        # nothing is sent ahead while the circuit breaker of the target is not closed
+        # or after the deadline of the scrape
+        if (len(missing) > 1 and BREAKERS.state(self.target) == CLOSED
+                and not self._deadline_expired()):
+            ASYNC_ENGINE.run(self._prefetch(missing))
+
+        return [self.connect_server(command) for command in commands]
+
+    async def _prefetch(self, commands):
+        if self._basic_auth:
+            auth = (self._username, self._password)
+            token_header = {"X-Auth-Token": None}
+        else:
+            auth = None
+            token_header = {"X-Auth-Token": self._auth_token}
+
+        semaphore = ASYNC_ENGINE.semaphore(self.target, self._max_concurrent_requests)
+
+        async def fetch(command):
+            url = f"https://{self.target}{command}"
+            headers = dict(token_header)
+            cached = RESPONSE_CACHE.peek(self.target, command) if RESPONSE_CACHE.enabled else None
+            if cached:
+                headers["If-None-Match"] = cached.etag
+
+            async with semaphore:
+                try:
+                    self._prefetched[url] = await self._fetch(url, headers, auth)
+                except requests.exceptions.RequestException as err:
+                    self._prefetched[url] = err
+
+        await asyncio.gather(*(fetch(command) for command in commands))
+
+
+class AsyncMetricsHandler(MetricsHandler):
+    """
+    Metrics Handler for the Falcon ASGI API, runs the scrape on the worker pool
+    of the async engine.
+    """
+
+    collector_class = AsyncRedfishMetricsCollector
+
+    async def on_get(self, req, resp):
+        """
+        Define the GET method for the API.
+        """
+        deadline = self.deadline(req)
+        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        resp.stream = await ASYNC_ENGINE.stream_in_worker(self.scrape, req, deadline)
+        resp.status = falcon.HTTP_200
+
+
+class AsyncProbeHandler(ProbeHandler):
+    """
+    Multi-Target Probe Handler for the Falcon ASGI API, runs the scrapes on the
+    worker pool of the async engine.
+    """
+
+    collector_class = AsyncRedfishMetricsCollector
+
+    async def on_get(self, req, resp):
+        """
+        Define the GET method for the API.
+        """
+        deadline = self.deadline(req)
+        targets, job, module = self.probe_params(req)
+        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        resp.stream = self.stream(targets, job, module, deadline)
+        resp.status = falcon.HTTP_200
+
+    async def stream(self, targets, job, module, deadline=None): # pylint: disable=invalid-overridden-method
+        """
+        Scrape the targets concurrently and yield their metrics as they complete.
+        """
+        seen = set()
+        semaphore = asyncio.Semaphore(self._workers)
+
+        async def probe(target):
+            async with semaphore:
+                return await ASYNC_ENGINE.run_in_worker(
+                    self.probe_target, target, job, module, deadline
+                )
+
+        for probe_done in asyncio.as_completed([probe(target) for target in targets]):
+            yield self.render(await probe_done, seen)
+
+
+class AsyncExporterMetricsHandler(ExporterMetricsHandler):
+    """
+    Self-monitoring metrics of the exporter process for the Falcon ASGI API.
+    """
+
+    async def on_get(self, req, resp): # pylint: disable=invalid-overridden-method
+        """
+        Define the GET method for the API.
+        """
+        super().on_get(req, resp)
+
+
+class AsyncWelcomePage(WelcomePage):
+    """
+    Welcome page for the Falcon ASGI API.
+    """
+
+    async def on_get(self, req, resp): # pylint: disable=invalid-overridden-method
+        """
+        Define the GET method for the API.
+        """
+        super().on_get(req, resp)
+
+
+class AsyncEngineLifecycle:
+    """
+    Falcon middleware starting and stopping the async engine with the server,
+    and the background polling, which scrapes through the engine.
+    """
+
+    def __init__(self, config):
+        self._config = config
+
+    async def process_startup(self, scope, event): # pylint: disable=unused-argument
+        """Start the engine when the ASGI server starts."""
+        await ASYNC_ENGINE.start()
+        POLLER.start(self._config, AsyncMetricsHandler)
+
+    async def process_shutdown(self, scope, event): # pylint: disable=unused-argument
+        """Stop the engine when the ASGI server shuts down."""
+        await asyncio.get_running_loop().run_in_executor(None, POLLER.stop)
+        await ASYNC_ENGINE.stop()
+
+
+def asgi_app(config, add_routes):
+    """Create the Falcon ASGI app with the routes of the exporter."""
+    ASYNC_ENGINE.configure(config)
+    api = falcon.asgi.App(middleware=[AsyncEngineLifecycle(config)])
+    add_routes(
+        api, config, AsyncMetricsHandler, AsyncProbeHandler, AsyncExporterMetricsHandler, AsyncWelcomePage
+    )
+    return api
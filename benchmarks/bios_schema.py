@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of the BIOS collector with a large attribute set.
+
+Compares the CPU time of a scrape with an empty schema cache (every attribute
+name is normalized and its labels are merged) against a scrape of a model, BIOS
+version and target seen before.
+
+    python benchmarks/bios_schema.py [attributes] [rounds]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from collectors import bios_collector
+from collectors.bios_collector import BiosCollector
+
+
+def attributes(count):
+    """Return a BIOS attribute set with names and values like the ones of large servers."""
+    values = ["Enabled", "Disabled", 42, 1.5, True, "Auto", "Performance", None]
+    names = ["PCIe{}-bitTagSupport", "(CPU{}-RP1VMD)Bus20", "ProcC{}State", "TME-MT/TDXkeysplit{}",
+             "ConsoleRedirection{}:", "MemoryPatrolScrub{}", "BroadcomNic{}Mode", "IntelVtForDirectedIo{}"]
+    return {names[index % len(names)].format(index): values[index % len(values)] for index in range(count)}
+
+
+class FakeCollector:
+    """Stands in for RedfishMetricsCollector, answers every request from the fixture."""
+
+    def __init__(self, bios_attributes):
+        self.target = "192.0.2.1"
+        self.manufacturer = "Lenovo"
+        self.model = "ThinkSystem SR675 V3"
+        self.labels = {
+            "host": "server1", "server_manufacturer": self.manufacturer,
+            "server_model": self.model, "server_serial": "J1234567",
+        }
+        self._responses = {
+            "/redfish/v1/Systems": {"Members": [{"@odata.id": "/redfish/v1/Systems/1"}]},
+            "/redfish/v1/Systems/1": {"Bios": {"@odata.id": "/redfish/v1/Systems/1/Bios"},
+                                      "BiosVersion": "KAE116L-2.30"},
+            "/redfish/v1/Systems/1/Bios": {"Attributes": bios_attributes},
+        }
+
+    def connect_server(self, command):
+        """Return the fixture response of command."""
+        return self._responses.get(command)
+
+
+def scrape(col):
+    """Run the BIOS collector once and return the number of samples."""
+    return sum(len(family.samples) for family in BiosCollector(col).collect())
+
+
+def measure(col, rounds, cold):
+    """Return the mean CPU seconds per scrape."""
+    total = 0.0
+    for _ in range(rounds):
+        if cold:
+            bios_collector._schemas.clear() # pylint: disable=protected-access
+            bios_collector._target_labels.clear() # pylint: disable=protected-access
+            bios_collector.camel_to_snake.cache_clear()
+        start = time.process_time()
+        scrape(col)
+        total += time.process_time() - start
+    return total / rounds
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 900
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    col = FakeCollector(attributes(count))
+    samples = scrape(col)
+
+    cold = measure(col, rounds, cold=True)
+    warm = measure(col, rounds, cold=False)
+    print(f"{count} attributes, {samples} samples, {rounds} rounds")
+    print(f"empty schema cache:    {cold * 1000:8.3f} ms CPU per scrape")
+    print(f"compiled schema:       {warm * 1000:8.3f} ms CPU per scrape")
+    print(f"saving:                {(cold - warm) * 1000:8.3f} ms ({(1 - warm / cold) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark of the JSON decoding of BMC responses.
+
+Compares requests.Response.json(), which guesses the charset of the body
+first, with the json module and orjson working on the raw bytes. Without
+arguments it uses generated payloads shaped like large vendor responses (BIOS
+Attributes, $expand'ed Sensors and FirmwareInventory), recorded responses can be
+given as JSON files instead.
+
+    python benchmarks/json_decoding.py [response.json ...]
+"""
+import json
+import os
+import sys
+import timeit
+from functools import partial
+
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def bios_payload(count=900):
+    """Return a Bios resource with count attributes."""
+    values = ["Enabled", "Disabled", 42, "Auto", "Performance", True]
+    return {
+        "@odata.id": "/redfish/v1/Systems/1/Bios",
+        "@odata.type": "#Bios.v1_1_0.Bios",
+        "AttributeRegistry": "BiosAttributeRegistryR760.1.2.3",
+        "Attributes": {f"ProcSetting{index}": values[index % len(values)] for index in range(count)},
+    }
+
+
+def sensors_payload(count=300):
+    """Return an expanded Sensors collection with count members."""
+    return {
+        "@odata.id": "/redfish/v1/Chassis/1/Sensors",
+        "Members@odata.count": count,
+        "Members": [
+            {
+                "@odata.id": f"/redfish/v1/Chassis/1/Sensors/Sensor{index}",
+                "Id": f"Sensor{index}",
+                "Name": f"System Board Temp {index}",
+                "Reading": 20.0 + index % 40,
+                "ReadingUnits": "Cel",
+                "ReadingType": "Temperature",
+                "Status": {"State": "Enabled", "Health": "OK"},
+                "Thresholds": {
+                    "UpperCritical": {"Reading": 90.0},
+                    "UpperCaution": {"Reading": 85.0},
+                    "LowerCaution": {"Reading": 3.0},
+                },
+                "PhysicalContext": "SystemBoard",
+            }
+            for index in range(count)
+        ],
+    }
+
+
+def firmware_payload(count=120):
+    """Return an expanded FirmwareInventory with count members."""
+    return {
+        "@odata.id": "/redfish/v1/UpdateService/FirmwareInventory",
+        "Members@odata.count": count,
+        "Members": [
+            {
+                "@odata.id": f"/redfish/v1/UpdateService/FirmwareInventory/Installed-{index}",
+                "Id": f"Installed-{index}",
+                "Name": f"Component {index} Firmware",
+                "Version": f"{index % 9}.{index % 17}.{index}",
+                "Updateable": True,
+                "Status": {"State": "Enabled", "Health": "OK"},
+                "Oem": {"Dell": {"DellSoftwareInventory": {"ComponentID": str(100000 + index)}}},
+            }
+            for index in range(count)
+        ],
+    }
+
+
+def payloads(paths):
+    """Return the raw bodies to decode, keyed by name."""
+    if paths:
+        bodies = {}
+        for path in paths:
+            with open(path, "rb") as file:
+                bodies[os.path.basename(path)] = file.read()
+        return bodies
+
+    return {
+        "bios_attributes": json.dumps(bios_payload()).encode("utf-8"),
+        "sensors_expanded": json.dumps(sensors_payload()).encode("utf-8"),
+        "firmware_expanded": json.dumps(firmware_payload()).encode("utf-8"),
+    }
+
+
+def response(body):
+    """Return a requests.Response without charset, like most BMCs send it."""
+    result = requests.Response()
+    result.status_code = 200
+    result.headers["Content-Type"] = "application/json"
+    result._content = body # pylint: disable=protected-access
+    return result
+
+
+def best(func, number):
+    """Return the fastest of five runs, in milliseconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    """Run the benchmark."""
+    decoders = {
+        "requests .json()": lambda body: response(body).json(),
+        "json.loads(bytes)": json.loads,
+    }
+    if orjson:
+        decoders["orjson.loads"] = orjson.loads
+    else:
+        print("orjson is not installed, skipping it")
+
+    print(f"{'payload':<20} {'size':>9}  " + "  ".join(f"{name:>18}" for name in decoders))
+    for name, body in payloads(sys.argv[1:]).items():
+        number = max(10, 2_000_000 // len(body))
+        times = [best(partial(decode, body), number) for decode in decoders.values()]
+        print(f"{name:<20} {len(body):>9}  " + "  ".join(f"{value:>15.3f} ms" for value in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Local Redfish server replaying the responses recorded with record_dir.
+
+Every recorded path is answered with its recorded status, headers and body after
+its recorded latency, requests with a matching If-None-Match are answered with
+304. Sessions can be created and deleted with any credentials, unknown paths
+answer 404.
+
+    python benchmarks/replay.py <recording directory> [port] [speed]
+
+speed divides the recorded latencies, 0 answers without delay.
+"""
+import json
+import os
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from OpenSSL import crypto
+
+SESSIONS_PATH = "/redfish/v1/SessionService/Sessions"
+
+
+def self_signed_context(directory):
+    """Return a server SSL context with a new self-signed certificate."""
+    key = crypto.PKey()
+    key.generate_key(crypto.TYPE_RSA, 2048)
+    cert = crypto.X509()
+    cert.get_subject().CN = "localhost"
+    cert.set_serial_number(1)
+    cert.gmtime_adj_notBefore(0)
+    cert.gmtime_adj_notAfter(24 * 3600)
+    cert.set_issuer(cert.get_subject())
+    cert.set_pubkey(key)
+    cert.sign(key, "sha256")
+
+    cert_file = os.path.join(directory, "cert.pem")
+    key_file = os.path.join(directory, "key.pem")
+    with open(cert_file, "wb") as file:
+        file.write(crypto.dump_certificate(crypto.FILETYPE_PEM, cert))
+    with open(key_file, "wb") as file:
+        file.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, key))
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+class Recording:
+    """The recorded responses of one target."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as file:
+            self.index = json.load(file)
+        self._bodies = {}
+
+    def body(self, entry):
+        """Return the recorded body of an entry."""
+        name = entry["body"]
+        if name not in self._bodies:
+            with open(os.path.join(self.directory, name), "rb") as file:
+                self._bodies[name] = file.read()
+        return self._bodies[name]
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """HTTPS server answering from a Recording and counting the requests and bytes sent."""
+
+    daemon_threads = True
+
+    def __init__(self, recording, port=0, speed=1.0):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.recording = recording
+        self.speed = speed
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._tmp = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        self.socket = self_signed_context(self._tmp.name).wrap_socket(self.socket, server_side=True)
+
+    @property
+    def port(self):
+        """Return the port the server listens on."""
+        return self.server_address[1]
+
+    def count(self, size):
+        """Count one request and the size of its response body."""
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    def reset(self):
+        """Reset the counters, returning their values."""
+        with self._lock:
+            counters = self.requests, self.bytes_sent
+            self.requests = self.bytes_sent = 0
+            return counters
+
+    def start(self):
+        """Serve on a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def server_close(self):
+        super().server_close()
+        self._tmp.cleanup()
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Answers one request from the recording of the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """Answer a GET request with its recorded response."""
+        entry = self.server.recording.index.get(self.path)
+        if entry is None:
+            self._send(404, {"Content-Type": "application/json"}, json.dumps({
+                "error": {"code": "Base.1.0.ResourceMissingAtURI", "message": f"{self.path} not found"}
+            }).encode("utf-8"))
+            return
+
+        if self.server.speed:
+            time.sleep(entry["latency"] / self.server.speed)
+
+        headers = entry["headers"]
+        etag = headers.get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self._send(304, {"ETag": etag}, b"")
+            return
+
+        self._send(entry["status"], headers, self.server.recording.body(entry))
+
+    def do_POST(self): # pylint: disable=invalid-name
+        """Create a session with any credentials."""
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        session = f"{SESSIONS_PATH}/{uuid.uuid4().hex}"
+        self._send(201, {
+            "Content-Type": "application/json",
+            "X-Auth-Token": uuid.uuid4().hex,
+            "Location": session,
+        }, json.dumps({"@odata.id": session}).encode("utf-8"))
+
+    def do_DELETE(self): # pylint: disable=invalid-name
+        """Delete a session."""
+        self._send(204, {}, b"")
+
+    def _send(self, status, headers, body):
+        self.server.count(len(body))
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        """Log nothing."""
+
+
+def main():
+    """Replay a recording until interrupted."""
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8443
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    server = ReplayServer(Recording(directory), port, speed)
+    print(f"Replaying {len(server.recording.index)} responses of {directory} on https://127.0.0.1:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
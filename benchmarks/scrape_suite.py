@@ -0,0 +1,193 @@
+"""
+Offline benchmark of the scrape modules against recorded servers.
+
+Every directory in benchmarks/fixtures is a recording of one server made with
+record_dir, e.g. benchmarks/fixtures/dell-r760. The fixture "synthetic" is
+generated by benchmarks/synthetic_fixture.py on every run. Each one is replayed with its
+recorded latencies by benchmarks/replay.py, and every module is scraped from it.
+The suite reports the wall time, the requests and the bytes of a scrape, after
+one warm-up scrape that fills the session pool and the caches like on a running
+exporter. It exits with 1 if nothing was measured, i.e. a fixture is unknown
+or a scrape sent no request, if a scrape needs more requests than in
+benchmarks/baseline.json or is slower than its baseline by more than the
+tolerance.
+
+    python benchmarks/scrape_suite.py [--rounds 5] [--speed 1] [--update] [fixture ...]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+# pylint: disable=wrong-import-position
+import synthetic_fixture
+from prometheus_client.exposition import generate_latest
+from replay import Recording, ReplayServer
+
+from capability_map import CAPABILITIES
+from circuit_breaker import BREAKERS
+from collector import RedfishMetricsCollector
+from collectors.certificate_collector import CERTIFICATE_CACHE
+from discovery_cache import DISCOVERY_CACHE
+from json_decoder import JSON_DECODER
+from response_cache import RESPONSE_CACHE
+from session_pool import SESSION_POOL
+from transport_pool import TRANSPORT_POOL
+
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures")
+SYNTHETIC = "synthetic"
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+MODULES = ["health", "performance", "sensors", "firmware", "bios"]
+
+# the settings of the exporter used for the scrapes, the defaults of the config file
+CONFIG = {"timeout": 10}
+
+# wall time differences below this are noise on a replayed local server
+WALL_SLACK = 0.01
+
+
+def scrape(target, module):
+    """Scrape one module of target and return the wall time."""
+    start = time.monotonic()
+    with RedfishMetricsCollector(
+        CONFIG, target = target, host = "localhost", usr = "bench", pwd = "bench",
+        metrics_type = module
+    ) as registry:
+        registry.get_session()
+        generate_latest(registry)
+    return time.monotonic() - start
+
+
+def benchmark(directory, rounds, speed):
+    """Return the results of all modules of the server recorded in directory."""
+    server = ReplayServer(Recording(directory), speed=speed).start()
+    target = f"127.0.0.1:{server.port}"
+    results = {}
+    try:
+        for module in MODULES:
+            scrape(target, module)
+            server.reset()
+
+            walls = []
+            for _ in range(rounds):
+                walls.append(scrape(target, module))
+            requests_sent, bytes_sent = server.reset()
+
+            results[module] = {
+                "wall_seconds": round(statistics.median(walls), 4),
+                "requests": requests_sent // rounds,
+                "bytes": bytes_sent // rounds,
+            }
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def regressions(fixture, results, baseline, tolerance):
+    """Return the regressions of a fixture against its baseline."""
+    found = []
+    for module, result in results.items():
+        expected = baseline.get(fixture, {}).get(module)
+        if not expected:
+            continue
+        if result["requests"] > expected["requests"]:
+            found.append(
+                f"{fixture}/{module}: {result['requests']} requests, baseline {expected['requests']}"
+            )
+        limit = expected["wall_seconds"] * (1 + tolerance) + WALL_SLACK
+        if result["wall_seconds"] > limit:
+            found.append(
+                f"{fixture}/{module}: {result['wall_seconds']} s, baseline {expected['wall_seconds']} s"
+            )
+    return found
+
+
+def load_baseline():
+    """Return the baseline results, keyed by fixture and module."""
+    try:
+        with open(BASELINE_FILE, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    """Run the suite."""
+    parser = argparse.ArgumentParser(description="Offline scrape benchmark against recorded servers")
+    parser.add_argument("fixtures", nargs="*", help="fixtures to run, default all")
+    parser.add_argument("--rounds", type=int, default=5, help="measured scrapes per module")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="divides the recorded latencies, 0 replays without delay")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative increase of the wall time")
+    parser.add_argument("--update", action="store_true", help="store the results as new baseline")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    for component in (SESSION_POOL, TRANSPORT_POOL, DISCOVERY_CACHE, RESPONSE_CACHE,
+                      CERTIFICATE_CACHE, BREAKERS, JSON_DECODER, CAPABILITIES):
+        component.configure(CONFIG)
+
+    directories = {
+        entry: os.path.join(FIXTURES_DIR, entry) for entry in os.listdir(FIXTURES_DIR)
+        if os.path.isfile(os.path.join(FIXTURES_DIR, entry, "index.json"))
+    } if os.path.isdir(FIXTURES_DIR) else {}
+    fixtures = args.fixtures or [SYNTHETIC, *sorted(directories)]
+    unknown = [fixture for fixture in fixtures if fixture != SYNTHETIC and fixture not in directories]
+    if unknown:
+        print(f"No recordings {', '.join(unknown)} in {FIXTURES_DIR}, record them with record_dir first.")
+        return 1
+
+    baseline = load_baseline()
+    found = []
+    failed = []
+    print(f"{'fixture':<20} {'module':<12} {'wall':>9} {'requests':>9} {'bytes':>10}")
+    synthetic_dir = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+    if SYNTHETIC in fixtures:
+        synthetic_fixture.write(synthetic_dir.name)
+        directories[SYNTHETIC] = synthetic_dir.name
+    try:
+        for fixture in fixtures:
+            results = benchmark(directories[fixture], args.rounds, args.speed)
+            for module, result in results.items():
+                print(
+                    f"{fixture:<20} {module:<12} {result['wall_seconds']:>8.3f}s"
+                    f" {result['requests']:>9} {result['bytes']:>10}"
+                )
+            # a scrape which sent no request did not reach the replayed server
+            failed.extend(f"{fixture}/{module}" for module, result in results.items() if not result["requests"])
+            found.extend(regressions(fixture, results, baseline, args.tolerance))
+            if args.update:
+                baseline[fixture] = results
+    finally:
+        SESSION_POOL.close_all()
+        TRANSPORT_POOL.close_all()
+        synthetic_dir.cleanup()
+
+    for scrape_failed in failed:
+        print(f"FAILED {scrape_failed}: no requests were sent")
+    if failed:
+        return 1
+
+    if args.update:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+
+    for regression in found:
+        print(f"REGRESSION {regression}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
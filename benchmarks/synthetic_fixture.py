@@ -0,0 +1,207 @@
+"""
+Generates the recording of a synthetic server for benchmarks/scrape_suite.py.
+
+The server is shaped like a two socket rack server with DIMMs, drives, sensors,
+firmware components and a large BIOS attribute set, and answers every request
+after a fixed latency. It is written in the format of record_dir, so it is
+replayed like a recorded server, and lets the suite run without the recording
+of a real one. The suite generates it into a temporary directory on every run,
+it can be written on its own to replay it with benchmarks/replay.py:
+
+    python benchmarks/synthetic_fixture.py <directory>
+"""
+import hashlib
+import json
+import os
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+# pylint: disable=wrong-import-position
+from collector import EXPAND_QUERY
+
+# seconds a resource and a collection take to answer, collections are slower on most BMCs
+LATENCY = 0.005
+COLLECTION_LATENCY = 0.02
+
+HEALTHY = {"Health": "OK", "State": "Enabled"}
+
+
+def link(path):
+    """Return a reference to path."""
+    return {"@odata.id": path}
+
+
+def resources(dimms=16, drives=8, sensors=60, firmware=20, bios_attributes=600):
+    """Return the resources of the server, keyed by path."""
+    tree = {}
+
+    def add(path, body):
+        tree[path] = {"@odata.id": path, **body}
+
+    def collection(path, members):
+        add(path, {"Members@odata.count": len(members), "Members": [link(member) for member in members]})
+
+    add("/redfish/v1", {
+        "RedfishVersion": "1.15.0",
+        "Vendor": "Dell",
+        "ProtocolFeaturesSupported": {"ExpandQuery": {"Levels": True, "MaxLevels": 1, "NoLinks": True}},
+        "Systems": link("/redfish/v1/Systems"),
+        "Chassis": link("/redfish/v1/Chassis"),
+        "Managers": link("/redfish/v1/Managers"),
+        "UpdateService": link("/redfish/v1/UpdateService"),
+        "SessionService": link("/redfish/v1/SessionService"),
+    })
+    add("/redfish/v1/SessionService", {"Sessions": link("/redfish/v1/SessionService/Sessions")})
+    add("/redfish/v1/UpdateService", {"FirmwareInventory": link("/redfish/v1/UpdateService/FirmwareInventory")})
+    collection("/redfish/v1/Systems", ["/redfish/v1/Systems/1"])
+    collection("/redfish/v1/Chassis", ["/redfish/v1/Chassis/1"])
+    collection("/redfish/v1/Managers", ["/redfish/v1/Managers/1"])
+
+    add("/redfish/v1/Systems/1", {
+        "Id": "1",
+        "Manufacturer": "Dell Inc.",
+        "Model": "PowerEdge R760",
+        "SKU": "SYNTH01",
+        "SerialNumber": "SYNTH01",
+        "PowerState": "On",
+        "Status": HEALTHY,
+        "Memory": link("/redfish/v1/Systems/1/Memory"),
+        "Processors": link("/redfish/v1/Systems/1/Processors"),
+        "Storage": link("/redfish/v1/Systems/1/Storage"),
+        "Bios": link("/redfish/v1/Systems/1/Bios"),
+        "Links": {"Chassis": [link("/redfish/v1/Chassis/1")], "ManagedBy": [link("/redfish/v1/Managers/1")]},
+    })
+    add("/redfish/v1/Managers/1", {"Id": "1", "FirmwareVersion": "7.00.00.00", "Status": HEALTHY})
+
+    memory = [f"/redfish/v1/Systems/1/Memory/DIMM{index}" for index in range(dimms)]
+    for index, path in enumerate(memory):
+        add(path, {
+            "Id": f"DIMM{index}", "Name": f"DIMM {index}", "CapacityMiB": 32768,
+            "MemoryDeviceType": "DDR5", "SerialNumber": f"DIMMSN{index:04}", "Status": HEALTHY,
+        })
+    collection("/redfish/v1/Systems/1/Memory", memory)
+
+    processors = [f"/redfish/v1/Systems/1/Processors/CPU{index}" for index in range(2)]
+    for index, path in enumerate(processors):
+        add(path, {"Id": f"CPU{index}", "Socket": f"CPU{index}", "TotalCores": 32, "Status": HEALTHY})
+    collection("/redfish/v1/Systems/1/Processors", processors)
+
+    disks = [f"/redfish/v1/Systems/1/Storage/RAID/Drives/{index}" for index in range(drives)]
+    for index, path in enumerate(disks):
+        add(path, {"Id": str(index), "Name": f"Disk {index}", "CapacityBytes": 960197124096, "Status": HEALTHY})
+    add("/redfish/v1/Systems/1/Storage/RAID", {
+        "Id": "RAID", "Name": "RAID Controller", "Status": HEALTHY, "Drives": [link(disk) for disk in disks],
+    })
+    collection("/redfish/v1/Systems/1/Storage", ["/redfish/v1/Systems/1/Storage/RAID"])
+
+    add("/redfish/v1/Chassis/1", {
+        "Id": "1", "Name": "Chassis", "Status": HEALTHY,
+        "Power": link("/redfish/v1/Chassis/1/Power"),
+        "Thermal": link("/redfish/v1/Chassis/1/Thermal"),
+        "PowerSubsystem": link("/redfish/v1/Chassis/1/PowerSubsystem"),
+        "Sensors": link("/redfish/v1/Chassis/1/Sensors"),
+        "NetworkAdapters": link("/redfish/v1/Chassis/1/NetworkAdapters"),
+    })
+    add("/redfish/v1/Chassis/1/Power", {
+        "PowerControl": [{"MemberId": "0", "PowerConsumedWatts": 412}],
+        "PowerSupplies": [
+            {"MemberId": str(index), "Name": f"PSU{index}", "PowerOutputWatts": 206, "Status": HEALTHY}
+            for index in range(2)
+        ],
+    })
+    add("/redfish/v1/Chassis/1/Thermal", {
+        "Fans": [{"MemberId": str(index), "Name": f"Fan{index}", "Reading": 6000, "Status": HEALTHY}
+                 for index in range(6)],
+        "Temperatures": [{"MemberId": "0", "Name": "Inlet", "ReadingCelsius": 22, "Status": HEALTHY}],
+    })
+    supplies = [f"/redfish/v1/Chassis/1/PowerSubsystem/PowerSupplies/{index}" for index in range(2)]
+    for index, path in enumerate(supplies):
+        add(path, {"Id": str(index), "Name": f"PSU{index}", "Model": "PWR SPLY 1400W", "Status": HEALTHY})
+    collection("/redfish/v1/Chassis/1/PowerSubsystem/PowerSupplies", supplies)
+    add("/redfish/v1/Chassis/1/PowerSubsystem", {
+        "CapacityWatts": 2800, "PowerSupplies": link("/redfish/v1/Chassis/1/PowerSubsystem/PowerSupplies"),
+    })
+    collection("/redfish/v1/Chassis/1/NetworkAdapters", [])
+
+    readings = [f"/redfish/v1/Chassis/1/Sensors/Sensor{index}" for index in range(sensors)]
+    for index, path in enumerate(readings):
+        add(path, {
+            "Id": f"Sensor{index}", "Name": f"System Board Temp {index}", "Reading": 20.0 + index % 40,
+            "ReadingUnits": "Cel", "ReadingType": "Temperature", "Status": HEALTHY,
+        })
+    collection("/redfish/v1/Chassis/1/Sensors", readings)
+
+    components = [f"/redfish/v1/UpdateService/FirmwareInventory/Installed-{index}" for index in range(firmware)]
+    for index, path in enumerate(components):
+        add(path, {
+            "Id": f"Installed-{index}", "Name": f"Component {index} Firmware",
+            "Version": f"{index % 9}.{index % 17}.{index}", "Updateable": True, "Status": HEALTHY,
+        })
+    collection("/redfish/v1/UpdateService/FirmwareInventory", components)
+
+    values = ["Enabled", "Disabled", 42, "Auto", "Performance", True]
+    add("/redfish/v1/Systems/1/Bios", {
+        "AttributeRegistry": "BiosAttributeRegistryR760.1.2.3",
+        "Attributes": {f"ProcSetting{index}": values[index % len(values)] for index in range(bios_attributes)},
+    })
+    return tree
+
+
+def expand(tree, body):
+    """Return body with the lists of references replaced by the referenced resources."""
+    return {
+        key: [tree[item["@odata.id"]] for item in value]
+        if isinstance(value, list) and value and all(list(item) == ["@odata.id"] for item in value)
+        else value
+        for key, value in body.items()
+    }
+
+
+def responses(tree):
+    """Return the answered requests, with the $expand'ed form of every resource."""
+    answered = {}
+    for path, body in tree.items():
+        latency = COLLECTION_LATENCY if "Members" in body else LATENCY
+        answered[path] = (body, latency)
+        answered[f"{path}?{EXPAND_QUERY}"] = (expand(tree, body), latency)
+    return answered
+
+
+def write(directory):
+    """Write the recording of the synthetic server into directory."""
+    os.makedirs(directory, exist_ok=True)
+    index = {}
+    for path, (body, latency) in responses(resources()).items():
+        content = json.dumps(body, indent=1, sort_keys=True).encode("utf-8")
+        name = f"{hashlib.sha1(path.encode('utf-8')).hexdigest()}.json"
+        with open(os.path.join(directory, name), "wb") as file:
+            file.write(content)
+        index[path] = {
+            "status": 200,
+            "headers": {
+                "Content-Type": "application/json",
+                "ETag": f'"{hashlib.md5(content).hexdigest()}"',
+            },
+            "latency": latency,
+            "body": name,
+        }
+
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=1, sort_keys=True)
+    return len(index)
+
+
+def main():
+    """Generate the recording."""
+    if len(sys.argv) != 2:
+        print(f"usage: {sys.argv[0]} <directory>")
+        sys.exit(1)
+
+    directory = sys.argv[1]
+    print(f"Wrote {write(directory)} responses to {directory}")
+
+
+if __name__ == "__main__":
+    main()
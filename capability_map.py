@@ -0,0 +1,101 @@
+"""Process-wide map of the Redfish resources each target does not provide."""
+import logging
+import threading
+import time
+
+# answers of a server which does not implement a resource
+MISSING_STATUSES = (404, 405, 501)
+
+
+class Capability:
+    """The known answer to a request: its status and the document, None for missing resources."""
+
+    def __init__(self, status, data, expires):
+        self.status = status
+        self.data = data
+        self.expires = expires
+
+
+class CapabilityMap:
+    """
+    Remembers per target the resources which answered 404, 405 or 501 and the
+    collections which were empty, e.g. ThermalSubsystem on servers which only have
+    Thermal. connect_server() answers later requests for them without sending them.
+
+    Entries expire after the TTL. All entries of a target are dropped when the
+    UUID or Redfish version of its service root or the BiosVersion of its system
+    changes, which is the case after most firmware updates. The stored documents
+    are shared between scrapes and must not be modified.
+    """
+
+    def __init__(self):
+        self.ttl = 3600
+        self._targets = {}
+        self._versions = {}
+        self._avoided = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.ttl = int(config.get("capability_ttl", 3600))
+        logging.info("Capability map TTL %s seconds", self.ttl)
+
+    @property
+    def enabled(self):
+        """Check if the map may hold any entries."""
+        return self.ttl > 0
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._targets.values())
+
+    def check_version(self, target, version):
+        """Drop the entries of target if its firmware version changed since they were recorded."""
+        with self._lock:
+            if self._versions.get(target, version) != version and self._targets.get(target):
+                logging.info("Target %s: Firmware changed, forgetting the missing resources.", target)
+                del self._targets[target]
+            self._versions[target] = version
+
+    def get(self, target, path):
+        """Return the Capability of path and count the request as avoided, or None."""
+        with self._lock:
+            entry = self._entry(target, path)
+            if entry:
+                self._avoided[target] = self._avoided.get(target, 0) + 1
+            return entry
+
+    def peek(self, target, path):
+        """Return the Capability of path without counting it."""
+        with self._lock:
+            return self._entry(target, path)
+
+    def record(self, target, path, status, data):
+        """Remember the answer to a request if the resource is missing or an empty collection."""
+        if status in MISSING_STATUSES:
+            data = None
+        elif not _empty_collection(data):
+            return
+
+        with self._lock:
+            self._targets.setdefault(target, {})[path] = Capability(status, data, time.time() + self.ttl)
+
+    def avoided(self, target):
+        """Return the number of requests to target answered from the map."""
+        with self._lock:
+            return self._avoided.get(target, 0)
+
+    def _entry(self, target, path):
+        entries = self._targets.get(target)
+        entry = entries.get(path) if entries else None
+        if entry and entry.expires <= time.time():
+            del entries[path]
+            return None
+        return entry
+
+
+def _empty_collection(data):
+    return isinstance(data, dict) and data.get("Members") == []
+
+
+CAPABILITIES = CapabilityMap()
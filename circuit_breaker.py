@@ -0,0 +1,115 @@
+"""Per-target circuit breakers, so that scrapes of unresponsive BMCs fail fast."""
+import logging
+import threading
+import time
+
+CLOSED = 0
+OPEN = 1
+HALF_OPEN = 2
+
+STATE_NAMES = {CLOSED: "closed", OPEN: "open", HALF_OPEN: "half-open"}
+
+
+class _Breaker:
+    """State of the breaker of one target."""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.changed = time.monotonic()
+
+
+class CircuitBreakers:
+    """
+    Counts the consecutive connection errors and timeouts of every target.
+
+    After breaker_failures of them the breaker of the target opens, and
+    connect_server() answers all requests to the target without sending them:
+    the running scrape finishes quickly and the following scrapes stop after
+    the service root with redfish_up 0. After breaker_cooldown seconds the
+    breaker is half-open and lets a single request through, usually the
+    service root of the next scrape. If it gets a response, the breaker closes
+    again, otherwise it stays open for another cool-down.
+    """
+
+    def __init__(self):
+        self.max_failures = 3
+        self.cooldown = 60
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.max_failures = int(config.get("breaker_failures", 3))
+        self.cooldown = int(config.get("breaker_cooldown", 60))
+        logging.info(
+            "Circuit breakers open after %s failures for %s seconds",
+            self.max_failures, self.cooldown
+        )
+
+    @property
+    def enabled(self):
+        """Check if the breakers are used."""
+        return self.max_failures > 0
+
+    def allow(self, target):
+        """Check if a request may be sent to target."""
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            breaker = self._breakers.get(target)
+            if not breaker or breaker.state == CLOSED:
+                return True
+
+            # a half-open breaker whose probe never finished allows the next one
+            if time.monotonic() - breaker.changed < self.cooldown:
+                return False
+
+            logging.info("Target %s: Circuit breaker half-open, probing the server.", target)
+            self._change(breaker, HALF_OPEN)
+            return True
+
+    def record(self, target, failed):
+        """Record the outcome of a request to target, failed means no response at all."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            breaker = self._breakers.setdefault(target, _Breaker())
+            if not failed:
+                if breaker.state != CLOSED:
+                    logging.info("Target %s: Circuit breaker closed.", target)
+                    self._change(breaker, CLOSED)
+                breaker.failures = 0
+                return
+
+            breaker.failures += 1
+            if breaker.state == HALF_OPEN or (
+                breaker.state == CLOSED and breaker.failures >= self.max_failures
+            ):
+                logging.warning(
+                    "Target %s: Circuit breaker open after %d failed requests, "
+                    "skipping requests for %s seconds.",
+                    target, breaker.failures, self.cooldown
+                )
+                self._change(breaker, OPEN)
+
+    def state(self, target):
+        """Return the state of the breaker of target."""
+        with self._lock:
+            breaker = self._breakers.get(target)
+            return breaker.state if breaker else CLOSED
+
+    def count_open(self):
+        """Return the number of breakers which are not closed."""
+        with self._lock:
+            return sum(1 for breaker in self._breakers.values() if breaker.state != CLOSED)
+
+    @staticmethod
+    def _change(breaker, state):
+        breaker.state = state
+        breaker.changed = time.monotonic()
+
+
+BREAKERS = CircuitBreakers()
@@ -4,22 +4,60 @@ import os
 import time
 import sys
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
-from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
 from collectors.performance_collector import PerformanceCollector
 from collectors.bios_collector import BiosCollector
 from collectors.firmware_collector import FirmwareCollector
 from collectors.health_collector import HealthCollector
 from collectors.certificate_collector import CertificateCollector
 from collectors.sensors_collector import SensorsCollector
+from session_pool import SESSION_POOL
+from transport_pool import TRANSPORT_POOL
+from discovery_cache import DISCOVERY_CACHE, Discovery
+from response_cache import RESPONSE_CACHE
+from request_metrics import REQUEST_DURATIONS
+from circuit_breaker import BREAKERS
+from json_decoder import JSON_DECODER
+from capability_map import CAPABILITIES
+from recorder import RECORDER
+from scrape_costs import SCRAPE_COSTS
+
+_target_semaphores = {}
+_target_semaphores_lock = threading.Lock()
+
+# targets which rejected an $expand query, with the time it happened
+_expand_rejected = {}
+EXPAND_RETRY_INTERVAL = 3600
+EXPAND_QUERY = "$expand=.($levels=1)"
+# answers of a server which does not support an $expand query
+EXPAND_REJECTED_STATUSES = (400, 404, 405, 501)
+
+# headers of every GET request to a BMC
+REQUEST_HEADERS = {"charset": "utf-8", "content-type": "application/json", "Accept": "application/json"}
+
+# shortest timeout of a request cut down to the remaining time of the scrape
+MIN_REQUEST_TIMEOUT = 0.1
+
+# the modules a combined ("all") scrape runs, in this order
+MODULES = ["health", "firmware", "performance", "sensors", "bios"]
+
+def _target_semaphore(target, limit):
+    """Return the semaphore bounding the concurrent requests to one target."""
+    with _target_semaphores_lock:
+        if target not in _target_semaphores:
+            _target_semaphores[target] = threading.BoundedSemaphore(limit)
+        return _target_semaphores[target]
 
 class RedfishMetricsCollector:
     """Class for collecting Redfish metrics."""
     def __enter__(self):
         return self
 
-    def __init__(self, config, target, host, usr, pwd, metrics_type):
+    def __init__(self, config, target, host, usr, pwd, metrics_type, modules=None, deadline=None): # pylint: disable=too-many-arguments
         self.target = target
         self.host = host
 
@@ -27,14 +65,37 @@ class RedfishMetricsCollector:
         self._password = pwd
 
         self.metrics_type = metrics_type
+        if modules:
+            self.modules = list(modules)
+        elif metrics_type == "all":
+            self.modules = list(MODULES)
+        else:
+            self.modules = [metrics_type]
+        self._module = self.modules[0]
 
         self._timeout = int(os.getenv("TIMEOUT", config.get('timeout', 10)))
+        # the scrape stops sending requests when the deadline passed
+        self._deadline = deadline
+        self._partial = False
+        self._max_concurrent_requests = max(
+            1, int(os.getenv("MAX_CONCURRENT_REQUESTS", config.get('max_concurrent_requests', 4)))
+        )
+        self._executor = None
+        self._expand = bool(config.get('expand_query', True))
         self.labels = {"host": self.host}
         self._redfish_up = 0
         self._response_time = 0
         self._last_http_code = 0
         self.powerstate = 0
 
+        # successful responses of this scrape, keyed by path
+        self._memo = {}
+        self._memo_saved = 0
+        self._memo_lock = threading.Lock()
+
+        # the capability map is used once the firmware version of the server is known
+        self._capabilities = False
+
         self.urls = {
             "Systems": "",
             "SessionService": "",
@@ -53,6 +114,7 @@ class RedfishMetricsCollector:
         }
 
         self.server_health = None
+        self._uuid = None
 
         self.manufacturer = ""
         self.model = ""
@@ -75,8 +137,15 @@ class RedfishMetricsCollector:
         self._auth_token = ""
         self._basic_auth = False
         self._session = ""
+        self._pooled = False
+        self._pool_key = (target, usr, pwd)
         self.redfish_version = "not available"
 
+    @property
+    def up(self):
+        """Check if a session with the server could be opened."""
+        return self._redfish_up
+
     def get_session(self):
         """Get the url for the server info and messure the response time"""
         logging.info("Target %s: Connecting to server %s", self.target, self.host)
@@ -103,6 +172,18 @@ class RedfishMetricsCollector:
             self.product = server_response['Product']
             logging.debug("Target %s: Product from root: %s", self.target, self.product)
 
+        self._uuid = server_response.get('UUID')
+
+        expand_query = server_response.get('ProtocolFeaturesSupported', {}).get('ExpandQuery', {})
+        rejected_at = _expand_rejected.get(self.target)
+        if rejected_at and time.time() - rejected_at < EXPAND_RETRY_INTERVAL:
+            self._expand = False
+        else:
+            self._expand = self._expand and bool(
+                expand_query.get('Levels') and expand_query.get('NoLinks')
+            )
+        logging.debug("Target %s: $expand supported: %s", self.target, self._expand)
+
         for key in ["Systems", "SessionService"]:
             if key in server_response:
                 self.urls[key] = server_response[key]['@odata.id']
@@ -115,6 +196,32 @@ class RedfishMetricsCollector:
                 )
                 return
 
+        if not SESSION_POOL.enabled:
+            self._create_session()
+            return
+
+        with SESSION_POOL.lock(self._pool_key):
+            pooled = SESSION_POOL.get(self._pool_key)
+            if pooled:
+                logging.info("Target %s: Reusing pooled session with server %s", self.target, self.host)
+                self._auth_token = pooled.token
+                self._session_url = pooled.session_url
+                self._pooled = True
+                self._redfish_up = 1
+                return
+
+            self._create_session()
+            if self._redfish_up:
+                self._store_pooled_session()
+
+    def _create_session(self):
+        """Log in to the SessionService and get an auth token, or fall back to basic auth."""
+        self._request_session()
+        if self._basic_auth:
+            SCRAPE_COSTS.auth(self.target, self._module, "basic_auth")
+
+    def _request_session(self):
+        """Log in to the SessionService and get an auth token."""
         session_service = self.connect_server(
             self.urls['SessionService'],
             basic_auth=True
@@ -140,13 +247,13 @@ class RedfishMetricsCollector:
 
         sessions_url = f"https://{self.target}{session_service['Sessions']['@odata.id']}"
         session_data = {"UserName": self._username, "Password": self._password}
-        self._session.auth = None
         result = ""
 
         # Try to get a session
         try:
+            SCRAPE_COSTS.auth(self.target, self._module, "login")
             result = self._session.post(
-                sessions_url, json=session_data, verify=False, timeout=self._timeout
+                sessions_url, json=session_data, verify=False, timeout=self._request_timeout()
             )
             result.raise_for_status()
 
@@ -163,8 +270,9 @@ class RedfishMetricsCollector:
                 self.target, self.host
             )
             try:
+                SCRAPE_COSTS.auth(self.target, self._module, "login")
                 result = self._session.post(
-                    sessions_url, json=session_data, verify=False, timeout=self._timeout
+                    sessions_url, json=session_data, verify=False, timeout=self._request_timeout()
                 )
                 result.raise_for_status()
 
@@ -213,15 +321,86 @@ class RedfishMetricsCollector:
             logging.info("Target %s: Got an auth token from server %s!", self.target, self.host)
             self._redfish_up = 1
 
+    def _store_pooled_session(self, relogin=False):
+        """Hand the current session over to the session pool."""
+        if self._session_url.startswith("http"):
+            session_url = self._session_url
+        else:
+            session_url = f"https://{self.target}{self._session_url}"
+
+        SESSION_POOL.put(self._pool_key, self._auth_token, session_url, relogin=relogin)
+        self._session_url = session_url
+        self._pooled = True
+
+    def _renew_session(self, stale_token):
+        """Replace a pooled auth token that the server does not accept anymore."""
+        if not self._pooled:
+            return False
+
+        logging.info("Target %s: Pooled session expired, logging in again.", self.target)
+
+        with SESSION_POOL.lock(self._pool_key):
+            # a concurrent request of this scrape renewed it already
+            if self._auth_token != stale_token:
+                return bool(self._auth_token)
+
+            SESSION_POOL.invalidate(self._pool_key, stale_token)
+            pooled = SESSION_POOL.get(self._pool_key)
+
+            # another scrape of the same target may have renewed it already
+            if pooled:
+                self._auth_token = pooled.token
+                self._session_url = pooled.session_url
+            else:
+                self._auth_token = ""
+                self._pooled = False
+                self._create_session()
+                if not self._auth_token:
+                    return False
+                self._store_pooled_session(relogin=True)
+
+        return True
+
     def connect_server(self, command, noauth=False, basic_auth=False):
         """Connect to the server and get the data."""
+        server_response, self._last_http_code = self._request(command, noauth, basic_auth)
+        return server_response
+
+    def _request(self, command, noauth=False, basic_auth=False):
+        """
+        Get the data of command and return it with the HTTP status of the request,
+        or 408 (timeout), 444 (connection error), 500 (other request error) and
+        503 (circuit breaker open). The data is None if the request failed. The
+        status is returned rather than kept in _last_http_code, which is shared by
+        the threads of connect_many().
+        """
         logging.captureWarnings(True)
 
+        memoized = self._memo.get(command)
+        if memoized:
+            logging.debug("Target %s: Reusing the response of %s from this scrape.", self.target, command)
+            with self._memo_lock:
+                self._memo_saved += 1
+            return memoized, 200
+
+        if not BREAKERS.allow(self.target):
+            logging.debug("Target %s: Circuit breaker open, skipping %s.", self.target, command)
+            return None, 503
+
+        if self._deadline_expired():
+            logging.debug("Target %s: Scrape deadline passed, skipping %s.", self.target, command)
+            self._partial = True
+            return None, 408
+
+        known = CAPABILITIES.get(self.target, command) if self._capabilities else None
+        if known:
+            logging.debug("Target %s: %s is missing or empty on this server, skipping it.", self.target, command)
+            return known.data, known.status
+
         req = ""
         req_text = ""
         server_response = None
-        self._last_http_code = 200
-        request_duration = 0
+        http_code = 200
         request_start = time.time()
 
         url = f"https://{self.target}{command}"
@@ -229,31 +408,43 @@ class RedfishMetricsCollector:
         # check if we already established a session with the server
         if not self._session:
             self._session = requests.Session()
+            self._session.verify = False
+            if TRANSPORT_POOL.enabled:
+                TRANSPORT_POOL.mount(self._session, self.target)
         else:
             logging.debug("Target %s: Using existing session.", self.target)
 
-        self._session.verify = False
-        self._session.headers.update({"charset": "utf-8"})
-        self._session.headers.update({"content-type": "application/json"})
-        self._session.headers.update({"Accept": "application/json"})
-
+        # the headers and auth are passed per request, the session is shared by
+        # the threads of connect_many()
+        headers = dict(REQUEST_HEADERS)
+        auth = None
+        token = None
         if noauth:
             logging.debug("Target %s: Using no auth", self.target)
         elif basic_auth or self._basic_auth:
-            self._session.auth = (self._username, self._password)
+            auth = (self._username, self._password)
             logging.debug("Target %s: Using basic auth with user %s", self.target, self._username)
         else:
             logging.debug("Target %s: Using auth token", self.target)
-            self._session.auth = None
-            self._session.headers.update({"X-Auth-Token": self._auth_token})
+            token = self._auth_token
+            headers["X-Auth-Token"] = token
+
+        # revalidate a cached response instead of downloading it again
+        cached = RESPONSE_CACHE.get(self.target, command) if RESPONSE_CACHE.enabled else None
+        if cached:
+            headers["If-None-Match"] = cached.etag
 
         logging.debug("Target %s: Using URL %s", self.target, url)
         try:
-            req = self._session.get(url, timeout=self._timeout)
+            req = self._get(url, headers, auth)
+            if req.status_code == 401 and token and self._renew_session(token):
+                req.close()
+                headers["X-Auth-Token"] = self._auth_token
+                req = self._get(url, headers, auth)
             req.raise_for_status()
 
         except requests.exceptions.HTTPError as err:
-            self._last_http_code = err.response.status_code
+            http_code = err.response.status_code
             if err.response.status_code in [401,403]:
                 logging.error(
                     "Target %s: Authorization Error: "
@@ -263,25 +454,42 @@ class RedfishMetricsCollector:
             else:
                 logging.error("Target %s: HTTP Error on server %s: %s", self.target, self.host, err)
 
+            if err.response.status_code == 404:
+                DISCOVERY_CACHE.invalidate(self.target, command)
+
         except requests.exceptions.ConnectTimeout:
             logging.error("Target %s: Timeout while connecting to %s", self.target, self.host)
-            self._last_http_code = 408
+            http_code = 408
 
         except requests.exceptions.ReadTimeout:
             logging.error("Target %s: Timeout while reading data from %s", self.target, self.host)
-            self._last_http_code = 408
+            http_code = 408
 
         except requests.exceptions.ConnectionError as err:
             logging.error("Target %s: Unable to connect to %s: %s", self.target, self.host, err)
-            self._last_http_code = 444
+            http_code = 444
         except requests.exceptions.RequestException:
             logging.error("Target %s: Unexpected error: %s", self.target, sys.exc_info()[0])
-            self._last_http_code = 500
-
-        if req != "":
-            self._last_http_code = req.status_code
+            http_code = 500
+
+        # a 304 has no body to replay, the response it confirms was recorded before
+        if req != "" and req.status_code != 304 and RECORDER.enabled:
+            RECORDER.record(self.target, command, req)
+
+        if req != "" and req.status_code == 304 and cached:
+            logging.debug("Target %s: %s not modified, using cached response.", self.target, command)
+            RESPONSE_CACHE.not_modified(self.target)
+            req.close()
+            parse_start = time.monotonic()
+            server_response = JSON_DECODER.loads(cached.body)
+            SCRAPE_COSTS.json_parsed(self.target, self._module, time.monotonic() - parse_start)
+
+        elif req != "":
+            http_code = req.status_code
             try:
-                req_text = req.json()
+                parse_start = time.monotonic()
+                req_text = JSON_DECODER.decode(req)
+                SCRAPE_COSTS.json_parsed(self.target, self._module, time.monotonic() - parse_start)
 
             except requests.JSONDecodeError:
                 logging.debug("Target %s: No json data received.", self.target)
@@ -290,8 +498,9 @@ class RedfishMetricsCollector:
                     "Target %s: Connection lost while reading response from %s: %s",
                     self.target, self.host, err
                 )
-                self._last_http_code = 444
-                return server_response
+                http_code = 444
+                self._observe_request(command, http_code, request_start)
+                return server_response, http_code
             finally:
                 req.close()
 
@@ -300,6 +509,10 @@ class RedfishMetricsCollector:
             if req:
                 server_response = req_text
 
+                etag = req.headers.get("ETag")
+                if etag and req_text and RESPONSE_CACHE.enabled:
+                    RESPONSE_CACHE.put(self.target, command, etag, req.content)
+
             # if the request fails the server might give a hint in the ExtendedInfo field
             else:
                 if req_text:
@@ -328,23 +541,154 @@ class RedfishMetricsCollector:
                                     req_text['error']['@Message.ExtendedInfo']['Message']
                                 )
 
-        request_duration = round(time.time() - request_start, 2)
-        logging.debug("Target %s: Request duration: %s", self.target, request_duration)
-        return server_response
+        if server_response:
+            self._memo[command] = server_response
+
+        status = req.status_code if req != "" else http_code
+        if self._capabilities:
+            CAPABILITIES.record(self.target, command, status, server_response)
+        self._observe_request(command, status, request_start, req if req != "" else None)
+        return server_response, http_code
+
+    def _observe_request(self, command, status, request_start, response=None):
+        """
+        Add the duration of a request to the BMC request duration histogram, count
+        it in the scrape costs and report timeouts and connection errors to the
+        circuit breaker. response is None if the request got no complete response.
+        """
+        request_duration = time.time() - request_start
+        logging.debug("Target %s: Request duration: %.2f", self.target, request_duration)
+        REQUEST_DURATIONS.observe(self.target, self._module, command, status, request_duration)
+        SCRAPE_COSTS.request(
+            self.target, self._module, status,
+            len(response.content) if response is not None else 0, response is not None
+        )
+
+        # a request cut off by the scrape deadline says nothing about the BMC
+        cut_off = status == 408 and self._deadline_expired()
+        if cut_off:
+            self._partial = True
+        BREAKERS.record(self.target, failed = status in (408, 444) and not cut_off)
+
+    def _deadline_expired(self):
+        """Check if the deadline of the scrape passed."""
+        return self._deadline is not None and self._deadline.expired
+
+    def _request_timeout(self):
+        """Return the timeout of the next request, capped by the remaining time of the scrape."""
+        if self._deadline is None:
+            return self._timeout
+        return max(MIN_REQUEST_TIMEOUT, min(self._timeout, self._deadline.remaining()))
+
+    def _get(self, url, headers, auth=None):
+        """Send a GET request over the session."""
+        return self._session.get(url, timeout=self._request_timeout(), headers=headers, auth=auth)
+
+    def connect_many(self, commands):
+        """
+        Get the data of several URLs, e.g. the Members of a collection, with a bounded
+        number of concurrent requests per target.
+
+        The responses are returned in the order of the given URLs, with None for
+        every URL that failed, the same way connect_server() reports it.
+        """
+        commands = list(commands)
+        if self._max_concurrent_requests == 1 or len(commands) < 2:
+            return [self.connect_server(command) for command in commands]
+
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_concurrent_requests,
+                thread_name_prefix=f"redfish-{self.target}"
+            )
+
+        semaphore = _target_semaphore(self.target, self._max_concurrent_requests)
+
+        def fetch(command):
+            with semaphore:
+                return self.connect_server(command)
+
+        return list(self._executor.map(fetch, commands))
+
+    def connect_collection(self, command, members_key="Members", collection=None, select=None):
+        """
+        Get the data of all members of a collection.
+
+        If the server supports it, the members are fetched expanded in a single request,
+        otherwise, or if the server rejects or truncates the expanded response, every
+        member is fetched on its own with connect_many().
+
+        members_key names the array holding the member links (e.g. "Drives" of a Storage
+        resource), collection can pass an already fetched copy of the resource and select
+        filters the members by their URL.
+
+        Returns the member data in collection order with None for failed members,
+        or None if the collection itself could not be read.
+        """
+        if self._expand:
+            separator = "&" if "?" in command else "?"
+            expanded, status = self._request(f"{command}{separator}{EXPAND_QUERY}")
+            if expanded is None and status in EXPAND_REJECTED_STATUSES:
+                logging.info(
+                    "Target %s: $expand rejected by server %s, fetching members one by one.",
+                    self.target, self.host
+                )
+                _expand_rejected[self.target] = time.time()
+                self._expand = False
+
+            elif expanded is None:
+                logging.debug(
+                    "Target %s: $expand request failed with status %s, fetching members one by one.",
+                    self.target, status
+                )
+
+            elif isinstance(expanded.get(members_key), list) and not self._truncated(expanded, members_key):
+                collection = expanded
+
+        if collection is None:
+            collection = self.connect_server(command)
+
+        if not collection or members_key not in collection:
+            return None
+
+        members = [
+            member for member in collection[members_key]
+            if not select or select(member['@odata.id'])
+        ]
+
+        # fetch the members which did not come back expanded
+        missing = [member['@odata.id'] for member in members if set(member) <= {'@odata.id'}]
+        fetched = dict(zip(missing, self.connect_many(missing)))
+
+        return [
+            fetched[member['@odata.id']] if member['@odata.id'] in fetched else member
+            for member in members
+        ]
+
+    @staticmethod
+    def _truncated(collection, members_key):
+        """Check if the server returned only part of the members."""
+        if f"{members_key}@odata.nextLink" in collection:
+            return True
+
+        count = collection.get(f"{members_key}@odata.count")
+        return isinstance(count, int) and count > len(collection[members_key])
 
     def get_base_labels(self):
         """Get the basic labels for the metrics."""
+        cached = DISCOVERY_CACHE.get(self.target, self._uuid)
+        if cached and self._use_cached_discovery(cached):
+            return
+
         systems = self.connect_server(self.urls['Systems'])
 
         if not systems:
             return
 
-        power_states = {"off": 0, "on": 1}
         # Get the server info for the labels
         server_info = {}
-        for member in systems['Members']:
-            self._systems_url = member['@odata.id']
-            info = self.connect_server(self._systems_url)
+        system_urls = [member['@odata.id'] for member in systems['Members']]
+        for info in self.connect_many(system_urls):
             if info:
                 server_info.update(info)
 
@@ -363,8 +707,6 @@ class RedfishMetricsCollector:
         if not self.manufacturer or not self.model:
             logging.error("Target %s: No manufacturer or model found on server %s!", self.target, self.host)
             return
-        power_state = server_info.get('PowerState')
-        self.powerstate = power_states[power_state.lower()] if power_state else 0
         # Dell has the Serial# in the SKU field, others in the SerialNumber field.
         if "SKU" in server_info and re.match(r'^[Dd]ell.*', server_info['Manufacturer']):
             self.serial = server_info.get('SKU', 'unknown')
@@ -380,12 +722,7 @@ class RedfishMetricsCollector:
             }
         )
 
-        status = server_info.get('Status', {})
-        health = status.get('Health') if isinstance(status, dict) else None
-        if health:
-            self.server_health = self.status[health.lower()]
-        else:
-            logging.warning("Target %s: No system health data available on server %s!", self.target, self.host)
+        self._update_server_state(server_info)
 
         # get the links of the parts for later
         for url in self.urls:
@@ -414,7 +751,65 @@ class RedfishMetricsCollector:
             logging.warning("Target %s: No Chassis links found on server %s!", self.target, self.host)
             return
 
-        self.get_chassis_urls()
+        if self.get_chassis_urls():
+            DISCOVERY_CACHE.put(
+                self.target,
+                Discovery(
+                    self._uuid, system_urls, self.urls,
+                    self.manufacturer, self.model, self.serial, self.vendor
+                )
+            )
+
+    def _use_cached_discovery(self, cached):
+        """
+        Take the urls and labels from a cached discovery and only refresh the
+        power state and health of the server.
+        """
+        logging.debug("Target %s: Using cached discovery.", self.target)
+
+        server_info = {}
+        for info in self.connect_many(cached.system_urls):
+            if info:
+                server_info.update(info)
+
+        if not server_info:
+            # a 404 dropped the cached discovery, so discover again
+            return DISCOVERY_CACHE.get(self.target, self._uuid) is not None
+
+        self.urls.update(cached.urls)
+        self.manufacturer = cached.manufacturer
+        self.model = cached.model
+        self.serial = cached.serial
+        self.vendor = cached.vendor
+        self.labels.update(
+            {
+                "host": self.host,
+                "server_manufacturer": self.manufacturer,
+                "server_model": self.model,
+                "server_serial": self.serial
+            }
+        )
+        self._update_server_state(server_info)
+        return True
+
+    def _update_server_state(self, server_info):
+        """Get the power state and health of the server."""
+        power_states = {"off": 0, "on": 1}
+        power_state = server_info.get('PowerState')
+        self.powerstate = power_states[power_state.lower()] if power_state else 0
+
+        status = server_info.get('Status', {})
+        health = status.get('Health') if isinstance(status, dict) else None
+        if health:
+            self.server_health = self.status[health.lower()]
+        else:
+            logging.warning("Target %s: No system health data available on server %s!", self.target, self.host)
+
+        if CAPABILITIES.enabled:
+            CAPABILITIES.check_version(
+                self.target, (self._uuid, self.redfish_version, server_info.get('BiosVersion'))
+            )
+            self._capabilities = True
 
     def get_chassis_urls(self):
         """Get the urls for the chassis parts."""
@@ -432,7 +827,8 @@ class RedfishMetricsCollector:
 
     def collect(self):
         """Collect the metrics."""
-        if self.metrics_type == 'health':
+        # a combined scrape reports the availability of the server whichever modules it runs
+        if 'health' in self.modules or self.metrics_type == 'all':
             up_metrics = GaugeMetricFamily(
                 "redfish_up",
                 "Redfish Server Monitoring availability",
@@ -471,12 +867,112 @@ class RedfishMetricsCollector:
             )
             yield response_metrics
 
+            if SESSION_POOL.enabled:
+                yield from self._session_pool_metrics()
+
+            if TRANSPORT_POOL.enabled:
+                yield from self._transport_pool_metrics()
+
+            if RESPONSE_CACHE.enabled:
+                yield from self._response_cache_metrics()
+
+            if CAPABILITIES.enabled:
+                avoided_metrics = CounterMetricFamily(
+                    "redfish_capability_requests_avoided_total",
+                    "Redfish requests not sent because the resource is known to be missing or empty",
+                    labels = self.labels,
+                )
+                avoided_metrics.add_sample(
+                    "redfish_capability_requests_avoided_total",
+                    value = CAPABILITIES.avoided(self.target),
+                    labels = self.labels,
+                )
+                yield avoided_metrics
+
+            if BREAKERS.enabled:
+                breaker_metrics = GaugeMetricFamily(
+                    "redfish_circuit_breaker_state",
+                    "Redfish Server Monitoring circuit breaker state (0 closed, 1 open, 2 half-open)",
+                    labels = self.labels,
+                )
+                breaker_metrics.add_sample(
+                    "redfish_circuit_breaker_state",
+                    value = BREAKERS.state(self.target),
+                    labels = self.labels,
+                )
+                yield breaker_metrics
+
         if self._redfish_up == 0:
+            yield from self._request_metrics()
             return
 
         self.get_base_labels()
 
-        if self.metrics_type == 'health':
+        # a single module reports the whole scrape, a combined scrape every module separately
+        combined = len(self.modules) > 1
+        for module in self.modules:
+            if self._deadline_expired():
+                logging.warning(
+                    "Target %s: Scrape deadline passed, skipping the modules from %s on.",
+                    self.target, module
+                )
+                self._partial = True
+                break
+
+            self._module = module
+            module_start = time.time() if combined else self._start_time
+            yield from self._collect_module(module)
+            yield self._scrape_duration_metrics(module, module_start)
+
+        if combined:
+            yield self._scrape_duration_metrics(self.metrics_type, self._start_time)
+
+        yield from self._request_metrics()
+
+        saved_metrics = GaugeMetricFamily(
+            "redfish_scrape_requests_saved",
+            "Redfish Server Monitoring requests answered from responses of the same scrape",
+            labels = self.labels,
+        )
+        saved_metrics.add_sample(
+            "redfish_scrape_requests_saved",
+            value = self._memo_saved,
+            labels = self.labels,
+        )
+        yield saved_metrics
+
+        if self._partial:
+            logging.warning(
+                "Target %s: Scrape deadline of %s seconds passed, returning partial results.",
+                self.target, round(self._deadline.timeout, 2)
+            )
+
+        partial_metrics = GaugeMetricFamily(
+            "redfish_scrape_partial",
+            "Redfish Server Monitoring scrape stopped at the Prometheus scrape timeout (1) or complete (0)",
+            labels = self.labels,
+        )
+        partial_metrics.add_sample(
+            "redfish_scrape_partial",
+            value = int(self._partial),
+            labels = self.labels,
+        )
+        yield partial_metrics
+
+    def _request_metrics(self):
+        """
+        Yield the request duration histogram and the costs of the modules of this
+        scrape, after closing the session so that the logout is included.
+        """
+        self.close_session()
+
+        labels = {"host": self.host}
+        yield REQUEST_DURATIONS.metrics(self.target, labels, self.modules)
+        yield from SCRAPE_COSTS.metrics(self.target, self.modules, labels)
+
+    def _collect_module(self, module):
+        """Collect the metrics of one module."""
+        if module == 'health':
 
             cert_metrics = CertificateCollector(self.host, self.target, self.labels)
             cert_metrics.collect()
@@ -504,56 +1000,146 @@ class RedfishMetricsCollector:
             yield metrics.health_metrics
 
         # Get the firmware information
-        if self.metrics_type == 'firmware':
+        if module == 'firmware':
             metrics = FirmwareCollector(self)
             metrics.collect()
 
             yield metrics.fw_metrics
 
         # Get the bios settings
-        if self.metrics_type == 'bios':
+        if module == 'bios':
             metrics = BiosCollector(self)
             for metric in metrics.collect():
                 yield metric
 
         # Get the performance information
-        if self.metrics_type == 'performance':
+        if module == 'performance':
             metrics = PerformanceCollector(self)
             metrics.collect()
 
             yield metrics.power_metrics
             yield metrics.temperature_metrics
 
-        if self.metrics_type == 'sensors':
+        if module == 'sensors':
             metrics = SensorsCollector(self)
             yield from metrics.collect()
 
-        # Finish with calculating the scrape duration
-        duration = round(time.time() - self._start_time, 2)
+    def _scrape_duration_metrics(self, module, start_time):
+        """Calculate the scrape duration of a module."""
+        duration = round(time.time() - start_time, 2)
         logging.info(
             "Target %s: %s scrape duration: %s seconds",
-            self.target, self.metrics_type, duration
+            self.target, module, duration
         )
 
         scrape_metrics = GaugeMetricFamily(
-            f"redfish_{self.metrics_type}_scrape_duration_seconds",
-            f"Redfish Server Monitoring redfish {self.metrics_type} scrape duration in seconds",
+            f"redfish_{module}_scrape_duration_seconds",
+            f"Redfish Server Monitoring redfish {module} scrape duration in seconds",
             labels = self.labels,
         )
 
         scrape_metrics.add_sample(
-            f"redfish_{self.metrics_type}_scrape_duration_seconds",
+            f"redfish_{module}_scrape_duration_seconds",
             value = duration,
             labels = self.labels,
         )
-        yield scrape_metrics
+        return scrape_metrics
+
+    def _response_cache_metrics(self):
+        """Report how often responses of this target were revalidated from the response cache."""
+        stats = RESPONSE_CACHE.stats(self.target)
+        descriptions = {
+            "hits": "Redfish requests revalidated with a cached ETag",
+            "misses": "Redfish requests without a cached response",
+            "not_modified": "Redfish requests answered with 304 Not Modified from the response cache",
+        }
+
+        for counter, description in descriptions.items():
+            metrics = CounterMetricFamily(
+                f"redfish_response_cache_{counter}_total",
+                description,
+                labels = self.labels,
+            )
+            metrics.add_sample(
+                f"redfish_response_cache_{counter}_total",
+                value = stats[counter],
+                labels = self.labels,
+            )
+            yield metrics
+
+    def _transport_pool_metrics(self):
+        """Report how often the scrapes of this target reused the pooled connections."""
+        stats = TRANSPORT_POOL.stats(self.target)
+        descriptions = {
+            "hits": "Scrapes which found the connections of this target in the transport pool",
+            "misses": "Scrapes which added this target to the transport pool",
+            "handshakes": "Connections opened to the server, each with a TCP and TLS handshake",
+            "handshakes_avoided": "Requests sent over a kept-alive connection without a new handshake",
+        }
+
+        for counter, description in descriptions.items():
+            metrics = CounterMetricFamily(
+                f"redfish_transport_{counter}_total",
+                description,
+                labels = self.labels,
+            )
+            metrics.add_sample(
+                f"redfish_transport_{counter}_total",
+                value = stats[counter],
+                labels = self.labels,
+            )
+            yield metrics
+
+    def _session_pool_metrics(self):
+        """Report how often the pooled session of this target was reused or renewed."""
+        stats = SESSION_POOL.stats(self._pool_key)
+        descriptions = {
+            "logins": "Redfish sessions created for the session pool",
+            "reuses": "Redfish sessions reused from the session pool",
+            "relogins": "Redfish sessions renewed after the server rejected a pooled token",
+        }
+
+        for counter, description in descriptions.items():
+            metrics = CounterMetricFamily(
+                f"redfish_session_{counter}_total",
+                description,
+                labels = self.labels,
+            )
+            metrics.add_sample(
+                f"redfish_session_{counter}_total",
+                value = stats[counter],
+                labels = self.labels,
+            )
+            yield metrics
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close_session()
+
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+        if self._session:
+            logging.info("Target %s: Closing requests session.", self.target)
+            TRANSPORT_POOL.release(self._session, self.target)
+            self._session.close()
+
+    def close_session(self):
+        """
+        Hand the Redfish session back to the session pool, or delete it on the
+        server. collect() does this before it reports the scrape costs, so that
+        they include the logout; __exit__ does it for scrapes that failed before.
+        """
         logging.debug("Target %s: Deleting Redfish session with server %s", self.target, self.host)
 
         response = None
 
-        if self._auth_token:
+        if self._pooled:
+            logging.debug("Target %s: Keeping pooled Redfish session with server %s", self.target, self.host)
+            SESSION_POOL.release(self._pool_key)
+            self._pooled = False
+            self._auth_token = ""
+
+        elif self._auth_token:
             if self._session_url.startswith("http"):
                 session_url = self._session_url
             else:
@@ -562,6 +1148,9 @@ class RedfishMetricsCollector:
 
             logging.debug("Target %s: Using URL %s", self.target, session_url)
 
+            # the logout belongs to the same module as the login
+            SCRAPE_COSTS.auth(self.target, self.modules[0], "logout")
+            self._auth_token = ""
             try:
                 response = self._session.delete(
                     session_url, verify=False, timeout=self._timeout, headers=headers
@@ -590,7 +1179,3 @@ class RedfishMetricsCollector:
                 self.host
             )
 
-        if self._session:
-            logging.info("Target %s: Closing requests session.", self.target)
-            self._session.close()
-
@@ -7,9 +7,23 @@ The __enter__ and __exit__ methods are used to manage the lifecycle of the BiosC
 
 import logging
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
 from prometheus_client.core import GaugeMetricFamily
 
+# number of (manufacturer, model, BIOS version) schemas kept, the least recently used is dropped
+MAX_SCHEMAS = 64
+# number of targets whose setting labels are kept, the least recently scraped is dropped
+MAX_TARGETS = 256
+
+_schemas = OrderedDict()
+_schemas_lock = threading.Lock()
+_target_labels = OrderedDict()
+_target_labels_lock = threading.Lock()
+
+@lru_cache(maxsize=8192)
 def camel_to_snake(name):
     """
     Convert a Redfish BIOS attribute name to a Prometheus-compatible snake_case
@@ -41,6 +55,94 @@ def camel_to_snake(name):
     s3 = re.sub(r'[^a-zA-Z0-9]+', '_', s2)
     return s3.strip('_').lower()
 
+class BiosSetting:
+    """
+    Metric name, help string and labels of one BIOS attribute.
+    """
+
+    def __init__(self, attr_name, metric_name):
+        self.metric_name = metric_name
+        self.documentation = f"Redfish BIOS Setting: {attr_name}"
+        self.labels = {"setting_name": attr_name}
+
+class BiosSchema:
+    """
+    The compiled BIOS attributes of one server model and BIOS version. The
+    attribute names only have to be normalized on the first scrape, later
+    scrapes just map the values. Attributes which are not exported are compiled
+    to None.
+    """
+
+    def __init__(self):
+        self._settings = {}
+
+    def __len__(self):
+        return len(self._settings)
+
+    def setting(self, attr_name):
+        """
+        Return the BiosSetting of an attribute, or None if it is not exported.
+        """
+        try:
+            return self._settings[attr_name]
+        except KeyError:
+            pass
+
+        # concurrent scrapes may compile an attribute twice, with the same result
+        setting = self._settings[attr_name] = self._compile(attr_name)
+        return setting
+
+    @staticmethod
+    def _compile(attr_name):
+        # Skip vendor-specific device configuration attributes
+        # e.g., Broadcom* attributes that are having complex names
+        # and create metric names longer than 80 characters
+        # Seen on Lenovo ThinkSystem SR675 V3
+        if attr_name.startswith('Broadcom'):
+            return None
+
+        # camel_to_snake guarantees Prometheus-safe output.
+        suffix = camel_to_snake(attr_name)
+        if not suffix:
+            # Defensive: an attribute name like "::" would normalise
+            # to nothing. Drop it rather than emit an invalid metric.
+            return None
+
+        return BiosSetting(attr_name, f"redfish_bios_{suffix}")
+
+def bios_schema(manufacturer, model, version):
+    """
+    Return the BiosSchema shared by all servers with the same model and BIOS version.
+    """
+    key = (manufacturer, model, version)
+    with _schemas_lock:
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = _schemas[key] = BiosSchema()
+            if len(_schemas) > MAX_SCHEMAS:
+                _schemas.popitem(last=False)
+        else:
+            _schemas.move_to_end(key)
+        return schema
+
+def target_labels(labels):
+    """
+    Return the label dicts of the settings of the target with labels, keyed by
+    the System URL and the attribute name, each with the string value it was
+    merged with. They are merged once and shared by the samples of all scrapes
+    of the target, and are not modified after that.
+    """
+    key = tuple(labels.items())
+    with _target_labels_lock:
+        settings = _target_labels.get(key)
+        if settings is None:
+            settings = _target_labels[key] = {}
+            if len(_target_labels) > MAX_TARGETS:
+                _target_labels.popitem(last=False)
+        else:
+            _target_labels.move_to_end(key)
+        return settings
+
 class BiosCollector:
     """
     Collects BIOS settings from the Redfish API.
@@ -72,6 +174,8 @@ class BiosCollector:
             logging.warning("Target %s: Cannot get Systems data!", self.col.target)
             return
 
+        setting_labels = target_labels(self.col.labels)
+
         # Iterate through each system
         for system_member in systems['Members']:
             system_url = system_member['@odata.id']
@@ -110,22 +214,24 @@ class BiosCollector:
                 attributes = bios_data['Attributes']
                 logging.info("Target %s: Received %d BIOS attributes.", 
                            self.col.target, len(attributes))
-                
+
+                schema = bios_schema(
+                    self.col.manufacturer,
+                    self.col.model,
+                    system_data.get('BiosVersion') or bios_data.get('AttributeRegistry', "")
+                )
+
                 # Export each BIOS setting as a separate metric
                 for attr_name, attr_value in attributes.items():
-                    # Skip vendor-specific device configuration attributes
-                    # e.g., Broadcom* attributes that are having complex names
-                    # and create metric names longer than 80 characters
-                    # Seen on Lenovo ThinkSystem SR675 V3
-                    if attr_name.startswith('Broadcom'):
+                    setting = schema.setting(attr_name)
+                    if setting is None:
                         continue
 
                     # Resolve the value first. Sequence/object-typed BIOS
                     # attributes (e.g. Fujitsu BootSources, PersistentBootConfigOrder)
                     # are skipped — emitting them would create an empty metric
                     # family with HELP/TYPE lines and zero samples.
-                    current_labels = self.col.labels.copy()
-                    current_labels["setting_name"] = attr_name
+                    setting_value = None
 
                     # bool first: Python `bool` is a subclass of `int`, so the
                     # int/float branch would otherwise swallow True/False.
@@ -142,28 +248,31 @@ class BiosCollector:
                             numeric_value = 0
                         else:
                             # For other string values, store as info metric with value 1
-                            current_labels["setting_value"] = str(attr_value)
+                            setting_value = str(attr_value)
                             numeric_value = 1
                     else:
                         # Skip unsupported types (lists, dicts, None, ...) entirely.
                         continue
 
-                    # Build the metric name only after we know we have a sample
-                    # to add. camel_to_snake guarantees Prometheus-safe output.
-                    metric_name = f"redfish_bios_{camel_to_snake(attr_name)}"
-                    if not metric_name or metric_name == "redfish_bios_":
-                        # Defensive: an attribute name like "::" would normalise
-                        # to nothing. Drop it rather than emit an invalid metric.
-                        continue
+                    label_key = (system_url, attr_name)
+                    merged_value, current_labels = setting_labels.get(label_key, (None, None))
+                    if current_labels is None or merged_value != setting_value:
+                        current_labels = {**self.col.labels, **setting.labels}
+                        if setting_value is not None:
+                            current_labels["setting_value"] = setting_value
+                        setting_labels[label_key] = (setting_value, current_labels)
 
-                    if metric_name not in self.bios_metrics:
-                        self.bios_metrics[metric_name] = GaugeMetricFamily(
+                    # Create the metric family only after we know we have a sample to add.
+                    metric_name = setting.metric_name
+                    bios_metric = self.bios_metrics.get(metric_name)
+                    if bios_metric is None:
+                        bios_metric = self.bios_metrics[metric_name] = GaugeMetricFamily(
                             metric_name,
-                            f"Redfish BIOS Setting: {attr_name}",
+                            setting.documentation,
                             labels=self.col.labels,
                         )
 
-                    self.bios_metrics[metric_name].add_sample(
+                    bios_metric.add_sample(
                         metric_name,
                         value=numeric_value,
                         labels=current_labels
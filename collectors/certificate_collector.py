@@ -3,9 +3,58 @@
 import logging
 import ssl
 import datetime
+import threading
+import time
 import OpenSSL
 from prometheus_client.core import GaugeMetricFamily
 
+# a failed certificate check is retried after this many seconds
+CERTIFICATE_RETRY_INTERVAL = 300
+
+class CertificateCache:
+    """
+    Keeps the parsed TLS certificate of every host, so that a /health scrape does
+    not need an extra TLS handshake with the BMC. The certificate is fetched again
+    after the TTL, a failed fetch after CERTIFICATE_RETRY_INTERVAL.
+    """
+
+    def __init__(self):
+        self.ttl = 21600
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.ttl = int(config.get("certificate_cache_ttl", 21600))
+        logging.info("Certificate cache TTL %s seconds", self.ttl)
+
+    def get(self, host, port, timeout):
+        """Return the certificate of host as OpenSSL X509 object, or None if it can't be read."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry and entry[1] > now:
+            return entry[0]
+
+        x509 = None
+        try:
+            cert = ssl.get_server_certificate((host, port), timeout=timeout)
+            x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_PEM, cert)
+
+        except (OSError, OpenSSL.SSL.Error, OpenSSL.crypto.Error) as e:
+            logging.debug("Host %s: Certificate Validation Error!", host)
+            logging.debug("Host %s: %s", host, e)
+
+        expires = now + (self.ttl if x509 else min(self.ttl, CERTIFICATE_RETRY_INTERVAL))
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[(host, port)] = (x509, expires)
+
+        return x509
+
+
+CERTIFICATE_CACHE = CertificateCache()
+
 class CertificateCollector:
     """Collects certificate information from the Redfish API."""
 
@@ -44,8 +93,6 @@ class CertificateCollector:
         '''Collect Certificate data'''
         logging.info("Target %s: Collecting certificate data ...", self.target)
 
-        cert = None
-        x509 = None
         cert_days_left = 0
         cert_valid = 0
         cert_has_right_hostname = 0
@@ -56,15 +103,10 @@ class CertificateCollector:
             "not_after": "n/a",
         }
 
-        try:
-            cert = ssl.get_server_certificate((self.host, self.port))
-            x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_PEM, cert)
-
-        except OpenSSL.SSL.Error as e:
-            logging.debug("Target %s: Certificate Validation Error!", self.target)
-            logging.debug("Target %s: %s", self.target, e)
+        # the days left are calculated on every scrape from the cached expiry date
+        x509 = CERTIFICATE_CACHE.get(self.host, self.port, self.timeout)
 
-        if cert and x509:
+        if x509:
             subject = [
                 value.decode('utf-8') for name, value in x509.get_subject().get_components()
                 if name.decode('utf-8') == 'CN'
@@ -35,58 +35,57 @@ class FirmwareCollector:
 
         logging.info("Target %s: Get the firmware information.", self.col.target)
 
-        fw_collection = self.col.connect_server(
-            "/redfish/v1/UpdateService/FirmwareInventory"
+        # only look at entries on a Dell server if the device is marked as installed
+        is_dell = search(".*Dell.*", self.col.manufacturer)
+        fw_items = self.col.connect_collection(
+            "/redfish/v1/UpdateService/FirmwareInventory",
+            select=lambda fw_member_url: not is_dell or "Installed" in fw_member_url
         )
-        if not fw_collection:
+        if not fw_items:
             logging.warning("Target %s: Cannot get Firmware data!", self.col.target)
             return
 
-        for fw_member in fw_collection['Members']:
-            fw_member_url = fw_member['@odata.id']
-            # only look at entries on a Dell server if the device is marked as installed
-            if (search(".*Dell.*", self.col.manufacturer) and ("Installed" in fw_member_url)) or not search(".*Dell.*", self.col.manufacturer):
-                fw_item = self.col.connect_server(fw_member_url)
-                if not fw_item:
-                    continue
-
-                item_name = fw_item['Name'].split(",", 1)[0]
-                # Id is unique within the FirmwareInventory collection. Required to prevent
-                # duplicate-labelset collisions when several components share a name
-                # (e.g. multiple PSUs, NICs of the same model).
-                current_labels = {
-                    "item_name": item_name,
-                    "item_id": fw_item.get("Id") or "unknown",
-                }
-
-                if self.col.manufacturer == 'Lenovo':
-                    # Lenovo has always Firmware: in front of the names, let's remove it
-                    item_name = fw_item['Name'].replace('Firmware:','')
-                    current_labels.update({"item_name": item_name})
-
-                current_labels.update({"serial": fw_item.get('SerialNumber') or 'n/a'})
-
-                if "Manufacturer" in fw_item:
-                    current_labels.update({"item_manufacturer": fw_item['Manufacturer']})
-
-                if "Version" in fw_item:
-                    version = fw_item['Version']
-                    # Some BMCs (Fujitsu iRMC, HPE iLO) pad version strings with
-                    # trailing whitespace; trim it so equivalent versions don't
-                    # produce different time series across vendors.
-                    if isinstance(version, str):
-                        version = version.strip()
-                    # An empty string is intentionally kept (rather than dropped)
-                    # so vendor reporting gaps are visible in the metrics — the
-                    # series will appear with version="" and can be alerted on.
-                    if version != "N/A" and version is not None:
-                        current_labels.update({"version": version})
-                        current_labels.update(self.col.labels)
-                        self.fw_metrics.add_sample(
-                            "redfish_firmware",
-                            value=1,
-                            labels=current_labels
-                        )
+        for fw_item in fw_items:
+            if not fw_item:
+                continue
+
+            item_name = fw_item['Name'].split(",", 1)[0]
+            # Id is unique within the FirmwareInventory collection. Required to prevent
+            # duplicate-labelset collisions when several components share a name
+            # (e.g. multiple PSUs, NICs of the same model).
+            current_labels = {
+                "item_name": item_name,
+                "item_id": fw_item.get("Id") or "unknown",
+            }
+
+            if self.col.manufacturer == 'Lenovo':
+                # Lenovo has always Firmware: in front of the names, let's remove it
+                item_name = fw_item['Name'].replace('Firmware:','')
+                current_labels.update({"item_name": item_name})
+
+            current_labels.update({"serial": fw_item.get('SerialNumber') or 'n/a'})
+
+            if "Manufacturer" in fw_item:
+                current_labels.update({"item_manufacturer": fw_item['Manufacturer']})
+
+            if "Version" in fw_item:
+                version = fw_item['Version']
+                # Some BMCs (Fujitsu iRMC, HPE iLO) pad version strings with
+                # trailing whitespace; trim it so equivalent versions don't
+                # produce different time series across vendors.
+                if isinstance(version, str):
+                    version = version.strip()
+                # An empty string is intentionally kept (rather than dropped)
+                # so vendor reporting gaps are visible in the metrics — the
+                # series will appear with version="" and can be alerted on.
+                if version != "N/A" and version is not None:
+                    current_labels.update({"version": version})
+                    current_labels.update(self.col.labels)
+                    self.fw_metrics.add_sample(
+                        "redfish_firmware",
+                        value=1,
+                        labels=current_labels
+                    )
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_tb is not None:
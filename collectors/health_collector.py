@@ -42,12 +42,11 @@ class HealthCollector():
     def get_processors_health(self):
         """Get the Processor data from the Redfish API."""
         logging.debug("Target %s: Get the CPU health data.", self.col.target)
-        processor_collection = self.col.connect_server(self.col.urls["Processors"])
+        processors = self.col.connect_collection(self.col.urls["Processors"])
 
-        if not processor_collection:
+        if not processors:
             return
-        for processor in processor_collection["Members"]:
-            processor_data = self.col.connect_server(processor["@odata.id"])
+        for processor_data in processors:
             if not processor_data:
                 continue
 
@@ -77,13 +76,12 @@ class HealthCollector():
     def get_storage_health(self):
         """Get the Storage data from the Redfish API."""
         logging.debug("Target %s: Get the storage health data.", self.col.target)
-        storage_collection = self.col.connect_server(self.col.urls["Storage"])
+        controllers = self.col.connect_collection(self.col.urls["Storage"])
 
-        if not storage_collection:
+        if not controllers:
             return
 
-        for controller in storage_collection["Members"]:
-            controller_data = self.col.connect_server(controller["@odata.id"])
+        for controller_data in controllers:
             if not controller_data:
                 continue
 
@@ -101,8 +99,10 @@ class HealthCollector():
                 current_labels
             )
 
-            for disk in controller_data["Drives"]:
-                disk_data = self.col.connect_server(disk["@odata.id"])
+            disks = self.col.connect_collection(
+                controller_data["@odata.id"], members_key="Drives", collection=controller_data
+            )
+            for disk_data in disks or []:
                 if not disk_data:
                     continue
 
@@ -319,8 +319,8 @@ class HealthCollector():
         if not adapters_collection:
             return
 
-        for member in adapters_collection.get("Members", []):
-            adapter_data = self.col.connect_server(member["@odata.id"])
+        adapter_urls = [member["@odata.id"] for member in adapters_collection.get("Members", [])]
+        for adapter_data in self.col.connect_many(adapter_urls):
             if not adapter_data:
                 continue
 
@@ -370,8 +370,8 @@ class HealthCollector():
             return "unknown"
 
         speeds = []
-        for member in ports_collection["Members"]:
-            port_data = self.col.connect_server(member["@odata.id"])
+        port_urls = [member["@odata.id"] for member in ports_collection["Members"]]
+        for port_data in self.col.connect_many(port_urls):
             if not port_data:
                 continue
 
@@ -404,12 +404,12 @@ class HealthCollector():
         """Get the Memory data from the Redfish API."""
         logging.debug("Target %s: Get the Memory data.", self.col.target)
 
-        memory_collection = self.col.connect_server(self.col.urls["Memory"])
-        if not memory_collection:
+        dimms = self.col.connect_collection(self.col.urls["Memory"])
+        if not dimms:
             return
 
-        for dimm_url in memory_collection["Members"]:
-            dimm_info = self.col.connect_server(dimm_url["@odata.id"])
+        dimms_with_metrics = []
+        for dimm_info in dimms:
             if not dimm_info:
                 continue
 
@@ -437,7 +437,14 @@ class HealthCollector():
             )
 
             if "Metrics" in dimm_info:
-                self.process_dimm_metrics(dimm_info, current_labels)
+                dimms_with_metrics.append((dimm_info, current_labels))
+
+        # fetch the error counters of all DIMMs in one batch
+        metrics_urls = [dimm_info["Metrics"]["@odata.id"] for dimm_info, _ in dimms_with_metrics]
+        for (dimm_info, current_labels), dimm_metrics in zip(
+            dimms_with_metrics, self.col.connect_many(metrics_urls)
+        ):
+            self.process_dimm_metrics(dimm_info, current_labels, dimm_metrics)
 
     def get_dimm_labels(self, dimm_info):
         """Generate labels for DIMM."""
@@ -458,9 +465,8 @@ class HealthCollector():
         labels.update(self.col.labels)
         return labels
 
-    def process_dimm_metrics(self, dimm_info, current_labels):
-        """Process DIMM metrics."""
-        dimm_metrics = self.col.connect_server(dimm_info["Metrics"]["@odata.id"])
+    def process_dimm_metrics(self, dimm_info, current_labels, dimm_metrics):
+        """Process DIMM metrics, dimm_metrics is None if fetching them failed."""
         if not dimm_metrics:
             return
 
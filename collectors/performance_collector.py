@@ -152,9 +152,9 @@ class PerformanceCollector:
             )
             return no_psu_metrics
 
-        power_supplies = self.col.connect_server(power_supplies_url)
+        power_supplies = self.col.connect_collection(power_supplies_url)
         
-        # Check if power_supplies data was received (connect_server returns "" on error)
+        # Check if power_supplies data was received (connect_collection returns None on error)
         if not power_supplies:
             logging.warning(
                 "Target %s: No power supplies data received.",
@@ -162,26 +162,22 @@ class PerformanceCollector:
             )
             return no_psu_metrics
 
-        if 'Members' in power_supplies:
-            power_supplies = power_supplies['Members']
-
-        for power_supply in power_supplies:
-            psu_failed = self.get_power_supply_metrics(power_supply)
+        for power_supply_data in power_supplies:
+            psu_failed = self.get_power_supply_metrics(power_supply_data)
             # Track success across all PSUs: fallback to legacy path only when NO PSU produced metrics.
             if not psu_failed:
                 no_psu_metrics = False
 
         return no_psu_metrics
 
-    def get_power_supply_metrics(self, power_supply):
-        """Get power supply metrics and update labels."""
+    def get_power_supply_metrics(self, power_supply_data):
+        """Get power supply metrics from the fetched PSU resource and update labels."""
         fields = ["Name", "Manufacturer", "Model"]
         metrics = ["PowerInputWatts", "PowerOutputWatts", "PowerCapacityWatts", "InputPowerWatts", "OutputPowerWatts"]
         no_psu_metrics = True
 
 
         power_supply_labels = {}
-        power_supply_data = self.col.connect_server(power_supply['@odata.id'])
 
         # Check if power_supply data was received (connect_server returns "" on error)
         if not power_supply_data:
@@ -33,18 +33,17 @@ class SensorsCollector:
     def collect(self):
         logging.info("Target %s: Get the Sensor data.", self.collector.target)
         url = self.collector.urls['Sensors']
-        sensors = self.collector.connect_server(url)
+        sensors = self.collector.connect_collection(url)
 
-        if sensors is None or 'Members' not in sensors:
+        if sensors is None:
             logging.warning("Target %s: Cannot get Sensors data!", self.collector.target)
             return []
 
-        if sensors['Members'] == []:
+        if sensors == []:
             logging.info("Target %s: No Sensors data found.", self.collector.target)
             return []
 
-        for sensor in sensors['Members']:
-            metric = self.collector.connect_server(sensor['@odata.id'])
+        for metric in sensors:
 
             if not metric:
                 continue
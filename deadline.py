@@ -0,0 +1,42 @@
+"""End-to-end deadline of a scrape, taken from the scrape timeout of Prometheus."""
+import logging
+import time
+
+# sent by Prometheus with every scrape
+TIMEOUT_HEADER = "X-Prometheus-Scrape-Timeout-Seconds"
+
+
+class Deadline:
+    """Point in time by which a scrape has to be answered."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._expires = time.monotonic() + timeout
+
+    def remaining(self):
+        """Return the seconds left until the deadline, 0 once it passed."""
+        return max(0.0, self._expires - time.monotonic())
+
+    @property
+    def expired(self):
+        """Check if the deadline passed."""
+        return self.remaining() <= 0
+
+    @classmethod
+    def from_request(cls, req, offset):
+        """
+        Return the deadline of a request with the scrape timeout header, offset
+        seconds earlier to leave time for rendering and sending the metrics. Requests
+        without the header have no deadline and None is returned.
+        """
+        value = req.get_header(TIMEOUT_HEADER)
+        if not value:
+            return None
+
+        try:
+            timeout = float(value)
+        except ValueError:
+            logging.warning("Ignoring invalid %s header: %s", TIMEOUT_HEADER, value)
+            return None
+
+        return cls(max(0.0, timeout - offset))
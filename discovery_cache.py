@@ -0,0 +1,83 @@
+"""Process-wide cache of the discovered Redfish topology of each target."""
+import logging
+import threading
+import time
+
+
+class Discovery:
+    """The resolved resource URLs and identity of one server."""
+
+    def __init__(self, uuid, system_urls, urls, manufacturer, model, serial, vendor):
+        self.uuid = uuid
+        self.system_urls = list(system_urls)
+        self.urls = dict(urls)
+        self.manufacturer = manufacturer
+        self.model = model
+        self.serial = serial
+        self.vendor = vendor
+        self.created = time.time()
+
+
+class DiscoveryCache:
+    """
+    Caches the topology found by RedfishMetricsCollector.get_base_labels() per target,
+    so that a scrape does not have to walk Systems and Chassis again.
+
+    An entry is dropped after the TTL, when the UUID of the service root changes or
+    when one of its URLs returns 404.
+    """
+
+    def __init__(self):
+        self.ttl = 3600
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.ttl = int(config.get("discovery_ttl", 3600))
+        logging.info("Discovery cache TTL %s seconds", self.ttl)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, target, uuid):
+        """Return the cached discovery of target, or None if there is no valid one."""
+        if self.ttl <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(target)
+            if not entry:
+                return None
+
+            if time.time() - entry.created > self.ttl:
+                logging.debug("Target %s: Cached discovery expired.", target)
+                del self._entries[target]
+                return None
+
+            if entry.uuid != uuid:
+                logging.info("Target %s: Service root UUID changed, discovering again.", target)
+                del self._entries[target]
+                return None
+
+            return entry
+
+    def put(self, target, discovery):
+        """Store the discovery of target."""
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[target] = discovery
+
+    def invalidate(self, target, url):
+        """Drop the cached discovery of target if it contains the given URL."""
+        with self._lock:
+            entry = self._entries.get(target)
+            if entry and (url in entry.urls.values() or url in entry.system_urls):
+                logging.info("Target %s: Cached URL %s not found, discovering again.", target, url)
+                del self._entries[target]
+
+
+DISCOVERY_CACHE = DiscoveryCache()
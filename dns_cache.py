@@ -0,0 +1,185 @@
+"""Process-wide cache of the DNS lookups of the targets."""
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# entries which are used within this fraction of their TTL before they expire are
+# looked up again in the background
+REFRESH_AHEAD = 0.2
+
+
+class _Entry:
+    """The result of a lookup, or the error it failed with."""
+
+    def __init__(self, result, error, expires):
+        self.result = result
+        self.error = error
+        self.expires = expires
+        self.refreshing = False
+
+
+class DnsCache:
+    """
+    Caches the forward and reverse lookups of MetricsHandler.resolve().
+
+    Successful lookups are kept for dns_cache_ttl seconds, failed ones for
+    dns_negative_ttl seconds. An entry which is used shortly before it expires is
+    looked up again in the background, so that frequently scraped targets never
+    wait for the resolver. If that lookup fails, the old result is kept until it
+    expires.
+    """
+
+    def __init__(self):
+        self.ttl = 300
+        self.negative_ttl = 30
+        self._entries = {}
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "refreshes": 0}
+        self._durations = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.ttl = int(config.get("dns_cache_ttl", 300))
+        self.negative_ttl = int(config.get("dns_negative_ttl", 30))
+        logging.info("DNS cache TTL %s seconds, negative TTL %s seconds", self.ttl, self.negative_ttl)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def gethostbyname(self, host):
+        """Cached socket.gethostbyname()."""
+        return self._lookup("forward", host, socket.gethostbyname)
+
+    def gethostbyaddr(self, address):
+        """Cached socket.gethostbyaddr()."""
+        return self._lookup("reverse", address, socket.gethostbyaddr)
+
+    def _lookup(self, kind, name, func):
+        if self.ttl <= 0:
+            return self._timed(kind, func, name)
+
+        key = (kind, name)
+        now = time.monotonic()
+        refresh = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires > now:
+                if entry.error:
+                    self._stats["negative_hits"] += 1
+                else:
+                    self._stats["hits"] += 1
+                    refresh = not entry.refreshing and entry.expires - now < self.ttl * REFRESH_AHEAD
+                    entry.refreshing = entry.refreshing or refresh
+            else:
+                entry = None
+                self._stats["misses"] += 1
+
+        if not entry:
+            return self._resolve(key, func)
+
+        if refresh:
+            self._refresh_executor().submit(self._refresh, key, func, entry)
+
+        if entry.error:
+            raise type(entry.error)(*entry.error.args)
+        return entry.result
+
+    def _resolve(self, key, func):
+        kind, name = key
+        try:
+            result = self._timed(kind, func, name)
+
+        except OSError as err:
+            self._store(key, _Entry(None, err, time.monotonic() + self.negative_ttl))
+            raise
+
+        self._store(key, _Entry(result, None, time.monotonic() + self.ttl))
+        return result
+
+    def _refresh(self, key, func, entry):
+        kind, name = key
+        try:
+            result = self._timed(kind, func, name)
+
+        except OSError as err:
+            logging.warning("Target %s: Refreshing the DNS lookup failed: %s", name, err)
+            with self._lock:
+                entry.refreshing = False
+            return
+
+        self._store(key, _Entry(result, None, time.monotonic() + self.ttl))
+        with self._lock:
+            self._stats["refreshes"] += 1
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+
+    def _timed(self, kind, func, name):
+        start = time.monotonic()
+        try:
+            return func(name)
+        finally:
+            duration = time.monotonic() - start
+            with self._lock:
+                buckets, _, _ = series = self._durations.setdefault(kind, [[0] * len(BUCKETS), 0, 0.0])
+                for index, bound in enumerate(BUCKETS):
+                    if duration <= bound:
+                        buckets[index] += 1
+                series[1] += 1
+                series[2] += duration
+
+    def _refresh_executor(self):
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dns")
+        return self._executor
+
+    def collect(self):
+        """Report the cache counters and the lookup durations, used by /metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            durations = {kind: (list(buckets), count, total)
+                         for kind, (buckets, count, total) in self._durations.items()}
+
+        descriptions = {
+            "hits": "DNS lookups answered from the cache",
+            "negative_hits": "DNS lookups answered with a cached failure",
+            "misses": "DNS lookups sent to the resolver",
+            "refreshes": "DNS cache entries refreshed in the background",
+        }
+        for counter, description in descriptions.items():
+            metrics = CounterMetricFamily(f"redfish_exporter_dns_cache_{counter}", description)
+            metrics.add_metric([], stats[counter])
+            yield metrics
+
+        entries_metrics = GaugeMetricFamily(
+            "redfish_exporter_dns_cache_entries",
+            "Lookups stored in the DNS cache",
+        )
+        entries_metrics.add_metric([], entries)
+        yield entries_metrics
+
+        duration_metrics = HistogramMetricFamily(
+            "redfish_exporter_dns_lookup_duration_seconds",
+            "Duration of the lookups sent to the resolver",
+            labels = ["kind"],
+        )
+        for kind, (buckets, count, total) in sorted(durations.items()):
+            duration_metrics.add_metric(
+                [kind],
+                [(str(bound), value) for bound, value in zip(BUCKETS, buckets)] + [("+Inf", count)],
+                total,
+            )
+        yield duration_metrics
+
+
+DNS_CACHE = DnsCache()
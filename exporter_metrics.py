@@ -0,0 +1,172 @@
+"""Self-monitoring metrics of the exporter process, served on /metrics."""
+import threading
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from session_pool import SESSION_POOL
+from transport_pool import TRANSPORT_POOL
+from discovery_cache import DISCOVERY_CACHE
+from response_cache import RESPONSE_CACHE
+from dns_cache import DNS_CACHE
+from circuit_breaker import BREAKERS
+from capability_map import CAPABILITIES
+from scrape_costs import SCRAPE_COSTS
+
+REGISTRY = CollectorRegistry()
+
+for _collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+    REGISTRY.register(_collector)
+
+SCRAPES_IN_FLIGHT = Gauge(
+    "redfish_exporter_scrapes_in_flight",
+    "Scrapes of a BMC currently running",
+    ["module"],
+    registry=REGISTRY,
+)
+SCRAPES = Counter(
+    "redfish_exporter_scrapes",
+    "Scrapes of a BMC started",
+    ["module"],
+    registry=REGISTRY,
+)
+SCRAPE_FAILURES = Counter(
+    "redfish_exporter_scrape_failures",
+    "Scrapes of a BMC that failed or found the Redfish API down",
+    ["module"],
+    registry=REGISTRY,
+)
+SCRAPES_COALESCED = Counter(
+    "redfish_exporter_scrapes_coalesced",
+    "Scrapes answered with the result of a concurrent scrape of the same target and module",
+    ["module"],
+    registry=REGISTRY,
+)
+QUEUE_WAIT = Histogram(
+    "redfish_exporter_queue_wait_seconds",
+    "Time a scrape waited for a free worker thread",
+    ["pool"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0),
+    registry=REGISTRY,
+)
+
+
+@contextmanager
+def track_scrape(module):
+    """Count a scrape of a BMC and keep it in the in-flight gauge while it runs."""
+    SCRAPES.labels(module).inc()
+    with SCRAPES_IN_FLIGHT.labels(module).track_inprogress():
+        try:
+            yield
+        except Exception:
+            SCRAPE_FAILURES.labels(module).inc()
+            raise
+
+
+def scrape_failed(module):
+    """Count a scrape which did not raise, but did not get data from the BMC."""
+    SCRAPE_FAILURES.labels(module).inc()
+
+
+def scrape_coalesced(module):
+    """Count a scrape which shared the result of a concurrent scrape."""
+    SCRAPES_COALESCED.labels(module).inc()
+
+
+def queued(pool, func, *args):
+    """Wrap func for a worker pool, so that its wait for a free worker is observed."""
+    submitted = time.monotonic()
+
+    def run():
+        QUEUE_WAIT.labels(pool).observe(time.monotonic() - submitted)
+        return func(*args)
+
+    return run
+
+
+class StateCollector:
+    """Reports the current state of the worker threads, the session pool and the caches."""
+
+    def collect(self):
+        """Collect the metrics."""
+        threads = GaugeMetricFamily(
+            "redfish_exporter_threads",
+            "Live threads of the exporter process",
+        )
+        threads.add_metric([], threading.active_count())
+        yield threads
+
+        sessions = GaugeMetricFamily(
+            "redfish_exporter_bmc_sessions",
+            "Redfish sessions kept open in the session pool",
+        )
+        sessions.add_metric([], len(SESSION_POOL))
+        yield sessions
+
+        transports = GaugeMetricFamily(
+            "redfish_exporter_transport_pool_targets",
+            "Targets whose connections are kept in the transport pool",
+        )
+        transports.add_metric([], len(TRANSPORT_POOL))
+        yield transports
+
+        transport_totals = TRANSPORT_POOL.totals()
+        for counter in ("hits", "handshakes", "handshakes_avoided"):
+            metrics = CounterMetricFamily(
+                f"redfish_exporter_transport_{counter}",
+                f"Transport pool {counter.replace('_', ' ')} of all targets",
+            )
+            metrics.add_metric([], transport_totals[counter])
+            yield metrics
+
+        breakers = GaugeMetricFamily(
+            "redfish_exporter_circuit_breakers_open",
+            "Targets whose circuit breaker is open or half-open",
+        )
+        breakers.add_metric([], BREAKERS.count_open())
+        yield breakers
+
+        capabilities = GaugeMetricFamily(
+            "redfish_exporter_capability_entries",
+            "Resources known to be missing or empty on their target",
+        )
+        capabilities.add_metric([], len(CAPABILITIES))
+        yield capabilities
+
+        discoveries = GaugeMetricFamily(
+            "redfish_exporter_discovery_cache_entries",
+            "Targets with a cached discovery",
+        )
+        discoveries.add_metric([], len(DISCOVERY_CACHE))
+        yield discoveries
+
+        entries = GaugeMetricFamily(
+            "redfish_exporter_response_cache_entries",
+            "Responses stored in the response cache",
+        )
+        entries.add_metric([], len(RESPONSE_CACHE))
+        yield entries
+
+        size = GaugeMetricFamily(
+            "redfish_exporter_response_cache_bytes",
+            "Size of the responses stored in the response cache",
+        )
+        size.add_metric([], RESPONSE_CACHE.size)
+        yield size
+
+        totals = RESPONSE_CACHE.totals()
+        for counter in ("hits", "misses", "not_modified"):
+            metrics = CounterMetricFamily(
+                f"redfish_exporter_response_cache_{counter}",
+                f"Response cache {counter.replace('_', ' ')} of all targets",
+            )
+            metrics.add_metric([], totals[counter])
+            yield metrics
+
+
+REGISTRY.register(StateCollector())
+REGISTRY.register(DNS_CACHE)
+REGISTRY.register(SCRAPE_COSTS)
@@ -6,16 +6,38 @@ import logging
 import socket
 import re
 import os
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import falcon
 
+from prometheus_client.core import GaugeMetricFamily
 from prometheus_client.exposition import CONTENT_TYPE_LATEST
 from prometheus_client.exposition import generate_latest
 
-from collector import RedfishMetricsCollector
+from collector import MODULES, RedfishMetricsCollector
+from poller import POLLER
+from dns_cache import DNS_CACHE
+from singleflight import SingleFlight
+from deadline import Deadline
+from exporter_metrics import REGISTRY as EXPORTER_REGISTRY
+from exporter_metrics import queued, scrape_coalesced, scrape_failed, track_scrape
 
 # pylint: disable=no-member
 
+def _list_param(req, name):
+    """
+    Return the values of a repeated and/or comma separated query string parameter.
+    """
+    values = req.get_param_as_list(name) or []
+    return [item for value in values for item in value.split(",") if item]
+
+def _render(family):
+    """
+    Return one metric family in the text exposition format.
+    """
+    return generate_latest(_FamilyRegistry([family]))
+
 class WelcomePage:
     """
     Create the Welcome page for the API.
@@ -37,6 +59,9 @@ class WelcomePage:
             <li><strong>Performance Metrics:</strong> Use <code>/performance</code> to retrieve performance-related metrics like power consumption and temperature data.</li>
             <li><strong>Sensors Metrics:</strong> Use <code>/sensors</code> to retrieve raw sensor readings (energy, voltage, current, temperature, ...).</li>
             <li><strong>BIOS Metrics:</strong> Use <code>/bios</code> to retrieve BIOS settings and pending-change state.</li>
+            <li><strong>All Metrics:</strong> Use <code>/all</code> to retrieve the metrics of all modules above (or the ones selected with <code>modules</code>) with one session and one discovery.</li>
+            <li><strong>Exporter Metrics:</strong> Use <code>/metrics</code> to retrieve the metrics of the exporter process itself (scrapes in flight, threads, sessions, caches, memory and CPU usage).</li>
+            <li><strong>Multi-Target Probe:</strong> Use <code>/probe</code> with several <code>target</code> parameters or a target <code>group</code> to scrape many servers in one request.</li>
         </ul>
         """
 
@@ -45,14 +70,37 @@ class MetricsHandler:
     Metrics Handler for the Falcon API.
     """
 
+    collector_class = RedfishMetricsCollector
+
+    # scrapes in flight, shared by the handlers of all modules
+    flights = SingleFlight()
+
     def __init__(self, config, metrics_type):
         self._config = config
         self.metrics_type = metrics_type
+        self._timeout_offset = float(config.get("scrape_timeout_offset", 0.5))
 
     def on_get(self, req, resp):
         """
         Define the GET method for the API.
         """
+        deadline = self.deadline(req)
+        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        resp.stream = self.scrape(req, deadline)
+        resp.status = falcon.HTTP_200
+
+    def deadline(self, req):
+        """
+        Return the deadline of the scrape from the Prometheus scrape timeout, or
+        None if the request has no timeout header.
+        """
+        return Deadline.from_request(req, self._timeout_offset)
+
+    def scrape(self, req, deadline=None):
+        """
+        Scrape the target given in the request and return an iterator of the
+        rendered metrics. Requests to the BMC stop when the deadline passes.
+        """
         target = req.get_param("target")
         if not target:
             logging.error("No target parameter provided!")
@@ -65,18 +113,177 @@ class MetricsHandler:
 
         logging.debug("Received Target %s with Job %s", target, job)
 
+        modules = self.modules_param(req) if self.metrics_type == "all" else None
+
+        polled = POLLER.get(target, self.metrics_type, job)
+        if polled and not modules:
+            if polled.expired:
+                logging.warning(
+                    "Target %s: The last completed %s poll is too old, reporting the server as down.",
+                    target, self.metrics_type
+                )
+                return [_render(self.up_metrics(target, 0)), self.data_age_metrics(target, polled.completed)]
+            return [polled.data, self.data_age_metrics(target, polled.completed)]
+
+        return self.stream_target(target, job, modules, deadline)
+
+    @staticmethod
+    def modules_param(req):
+        """
+        Return the modules selected with the modules parameter of a combined scrape.
+        """
+        modules = _list_param(req, "modules")
+        if not modules:
+            return None
+
+        unknown = [module for module in modules if module not in MODULES]
+        if unknown:
+            msg = f"Unknown module: {', '.join(unknown)}"
+            logging.error(msg)
+            raise falcon.HTTPInvalidParam(msg, "modules")
+
+        # run the modules in the usual order and every module only once
+        return [module for module in MODULES if module in modules]
+
+    def scrape_target(self, target, job, modules=None, deadline=None):
+        """
+        Scrape the target and return the metrics.
+        """
+        return b"".join(self.stream_target(target, job, modules, deadline))
+
+    def stream_target(self, target, job, modules=None, deadline=None):
+        """
+        Scrape the target and return an iterator of its metric families, rendered
+        one by one as the collector yields them. The target and the job are checked
+        right away, so that their errors are raised before the response starts.
+        """
+        chunks = self._stream_target(target, job, modules, deadline)
+        next(chunks)
+        return chunks
+
+    def _stream_target(self, target, job, modules, deadline):
+        """
+        Concurrent scrapes of the same address, module and credentials share the
+        families of the first one, which is collected within its own deadline and
+        finished for the others if its client disconnects.
+        """
+        with track_scrape(self.metrics_type):
+            target, host = self.resolve(target)
+            usr, pwd = self.credentials(target, job)
+
+            key = (target, self.metrics_type, tuple(modules or ()), usr, pwd)
+
+            def joined():
+                logging.debug("Target %s: Sharing the result of a concurrent scrape.", target)
+                scrape_coalesced(self.metrics_type)
+
+            # the target and the job are valid
+            yield b""
+
+            try:
+                yield from self.flights.stream(
+                    key, self.collect_target, target, host, usr, pwd, modules, deadline,
+                    deadline = deadline, joined = joined
+                )
+            except TimeoutError:
+                logging.error("Target %s: The shared scrape did not finish before the deadline.", target)
+                scrape_failed(self.metrics_type)
+                yield _render(self.scrape_error_metrics(host))
+
+    def collect_target(self, target, host, usr, pwd, modules, deadline): # pylint: disable=too-many-arguments
+        """
+        Collect the metrics of the resolved target and yield them family by family.
+        The response has already started, so errors are reported as
+        redfish_scrape_error.
+        """
+        with self.collector_class(
+            self._config,
+            target = target,
+            host = host,
+            usr = usr,
+            pwd = pwd,
+            metrics_type = self.metrics_type,
+            modules = modules,
+            deadline = deadline
+        ) as registry:
+
+            try:
+                # open a session with the remote board
+                registry.get_session()
+
+                # collect the actual metrics
+                for family in registry.collect():
+                    yield _render(family)
+
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.error("Target %s: Exception: %s", target, traceback.format_exc())
+                scrape_failed(self.metrics_type)
+                yield _render(self.scrape_error_metrics(host))
+                return
+
+            if not registry.up:
+                scrape_failed(self.metrics_type)
+
+    @staticmethod
+    def scrape_error_metrics(host):
+        """
+        Return redfish_scrape_error for a scrape which failed after the response started.
+        """
+        labels = {"host": host}
+        error_metrics = GaugeMetricFamily(
+            "redfish_scrape_error",
+            "Redfish Server Monitoring scrape failed with an error, the metrics are incomplete",
+            labels = labels,
+        )
+        error_metrics.add_sample("redfish_scrape_error", value = 1, labels = labels)
+        return error_metrics
+
+    @staticmethod
+    def up_metrics(host, up):
+        """
+        Return redfish_up for one target.
+        """
+        labels = {"host": host}
+        up_metrics = GaugeMetricFamily(
+            "redfish_up",
+            "Redfish Server Monitoring availability",
+            labels = labels,
+        )
+        up_metrics.add_sample("redfish_up", value = up, labels = labels)
+        return up_metrics
+
+    @staticmethod
+    def data_age_metrics(host, completed):
+        """
+        Return redfish_data_age_seconds for a result of the background polling.
+        """
+        labels = {"host": host}
+        age_metrics = GaugeMetricFamily(
+            "redfish_data_age_seconds",
+            "Redfish Server Monitoring age of the polled data in seconds",
+            labels = labels,
+        )
+        age_metrics.add_sample(
+            "redfish_data_age_seconds",
+            value = round(time.time() - completed, 2),
+            labels = labels
+        )
+        return _render(age_metrics)
+
+    def resolve(self, target):
+        """
+        Return the IP address and the hostname of the target.
+        """
         ip_re = re.compile(
             r"^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}"
             r"([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$"
         )
 
-        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
-
         host = None
         if ip_re.match(target):
             logging.debug("Target %s: Target is an IP Address.", target)
             try:
-                host = socket.gethostbyaddr(target)[0]
+                host = DNS_CACHE.gethostbyaddr(target)[0]
             except socket.herror as err:
                 logging.warning("Target %s: Reverse DNS lookup failed: %s. Using IP address as host.", target, err)
                 host = target
@@ -84,12 +291,18 @@ class MetricsHandler:
             logging.debug("Target %s: Target is a hostname.", target)
             host = target
             try:
-                target = socket.gethostbyname(host)
+                target = DNS_CACHE.gethostbyname(host)
             except socket.gaierror as err:
                 msg = f"Target {target}: DNS lookup failed: {err}"
                 logging.error(msg)
                 raise falcon.HTTPInvalidParam(msg, "target")
 
+        return target, host
+
+    def credentials(self, target, job):
+        """
+        Return the user and password configured for the job.
+        """
         usr_env_var = job.replace("-", "_").upper() + "_USERNAME"
         pwd_env_var = job.replace("-", "_").upper() + "_PASSWORD"
         usr = os.getenv(usr_env_var, self._config.get("username"))
@@ -105,25 +318,192 @@ class MetricsHandler:
             raise falcon.HTTPInvalidParam(msg, "job")
 
         logging.debug("Target %s: Using user %s", target, usr)
+        return usr, pwd
 
-        with RedfishMetricsCollector(
-            self._config,
-            target = target,
-            host = host,
-            usr = usr,
-            pwd = pwd,
-            metrics_type = self.metrics_type
-        ) as registry:
 
-            # open a session with the remote board
-            registry.get_session()
+class ExporterMetricsHandler:
+    """
+    Self-monitoring metrics of the exporter process.
+    """
+
+    def on_get(self, req, resp): # pylint: disable=unused-argument
+        """
+        Define the GET method for the API.
+        """
+        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        resp.data = generate_latest(EXPORTER_REGISTRY)
+        resp.status = falcon.HTTP_200
 
-            try:
-                # collect the actual metrics
-                resp.text = generate_latest(registry)
-                resp.status = falcon.HTTP_200
 
-            except Exception:
-                message = f"Exception: {traceback.format_exc()}"
-                logging.error("Target %s: %s", target, message)
-                raise falcon.HTTPBadRequest(description=message)
+class _FamilyRegistry:
+    """
+    Minimal registry exposing a list of metric families to generate_latest.
+    """
+
+    def __init__(self, families):
+        self._families = families
+
+    def collect(self):
+        """
+        Return the metric families.
+        """
+        return self._families
+
+
+class ProbeHandler(MetricsHandler):
+    """
+    Multi-Target Probe Handler for the Falcon API.
+
+    Scrapes all targets given as repeated target parameters or as target group
+    from the config file concurrently and streams one combined exposition, each
+    target as soon as it is done.
+    """
+
+    modules = MODULES + ["all"]
+
+    def __init__(self, config, metrics_type=None):
+        super().__init__(config, metrics_type)
+        self._workers = int(config.get("probe_workers", 16))
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="probe")
+
+    def on_get(self, req, resp):
+        """
+        Define the GET method for the API.
+        """
+        deadline = self.deadline(req)
+        targets, job, module = self.probe_params(req)
+        resp.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        resp.stream = self.stream(targets, job, module, deadline)
+        resp.status = falcon.HTTP_200
+
+    def probe_params(self, req):
+        """
+        Return the targets, job and module of a probe request.
+        """
+        targets = _list_param(req, "target")
+        group = req.get_param("group")
+        if group:
+            target_groups = self._config.get("target_groups") or {}
+            if group not in target_groups:
+                msg = f"Unknown target group: {group}"
+                logging.error(msg)
+                raise falcon.HTTPInvalidParam(msg, "group")
+            targets.extend(target_groups[group])
+
+        if not targets:
+            logging.error("No target or group parameter provided!")
+            raise falcon.HTTPMissingParam("target")
+
+        job = req.get_param("job")
+        if not job:
+            logging.error("No job provided for probe of %s!", ", ".join(targets))
+            raise falcon.HTTPMissingParam("job")
+
+        module = req.get_param("module") or "health"
+        if module not in self.modules:
+            msg = f"Unknown module: {module}"
+            logging.error(msg)
+            raise falcon.HTTPInvalidParam(msg, "module")
+
+        # keep the order, but scrape every target only once
+        return list(dict.fromkeys(targets)), job, module
+
+    def stream(self, targets, job, module, deadline=None):
+        """
+        Scrape the targets concurrently and yield their metrics as they complete.
+        """
+        seen = set()
+        futures = [
+            self._executor.submit(queued("probe", self.probe_target, target, job, module, deadline))
+            for target in targets
+        ]
+        for future in as_completed(futures):
+            yield self.render(future.result(), seen)
+
+    def probe_target(self, target, job, module, deadline=None):
+        """
+        Scrape one target and return its metric families. Errors are reported
+        as redfish_probe_error instead of failing the whole probe.
+        """
+        with track_scrape(module):
+            families = self._probe_target(target, job, module, deadline)
+
+        if any(family.name == "redfish_probe_error" for family in families):
+            scrape_failed(module)
+        return families
+
+    def _probe_target(self, target, job, module, deadline):
+        host = target
+        stage = "dns_lookup"
+        try:
+            target, host = self.resolve(target)
+            stage = "credentials"
+            usr, pwd = self.credentials(target, job)
+            stage = "collection"
+
+            with self.collector_class(
+                self._config,
+                target = target,
+                host = host,
+                usr = usr,
+                pwd = pwd,
+                metrics_type = module,
+                deadline = deadline
+            ) as registry:
+
+                registry.get_session()
+                families = []
+                for family in registry.collect():
+                    # the collector adds the server labels to its label dict later on,
+                    # copy the labels of the families yielded before that
+                    family.samples = [
+                        sample._replace(labels = dict(sample.labels)) for sample in family.samples
+                    ]
+                    families.append(family)
+                up = registry.up
+
+        except falcon.HTTPError:
+            # already logged while resolving the target or the credentials
+            return [self.up_metrics(host, 0), self.error_metrics(host, stage)]
+
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.error("Target %s: Exception: %s", target, traceback.format_exc())
+            return [self.up_metrics(host, 0), self.error_metrics(host, stage)]
+
+        if not any(family.name == "redfish_up" for family in families):
+            families.insert(0, self.up_metrics(host, up))
+        if not up:
+            families.append(self.error_metrics(host, "session"))
+        return families
+
+    @staticmethod
+    def error_metrics(host, error):
+        """
+        Return redfish_probe_error for one target, error names the failed step.
+        """
+        labels = {"host": host, "error": error}
+        error_metrics = GaugeMetricFamily(
+            "redfish_probe_error",
+            "Redfish Server Monitoring probe of the target failed",
+            labels = labels,
+        )
+        error_metrics.add_sample("redfish_probe_error", value = 1, labels = labels)
+        return error_metrics
+
+    @staticmethod
+    def render(families, seen):
+        """
+        Render the metric families of one target, HELP and TYPE lines are only
+        written for families not rendered for an earlier target.
+        """
+        output = []
+        for family in families:
+            text = _render(family).decode("utf-8")
+            if family.name in seen:
+                text = "".join(
+                    line for line in text.splitlines(keepends=True) if not line.startswith("#")
+                )
+            seen.add(family.name)
+            output.append(text)
+
+        return "".join(output).encode("utf-8")
@@ -0,0 +1,59 @@
+"""Decoding of the JSON bodies of the BMC responses, with orjson if it is installed."""
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "json")
+
+
+class JsonDecoder:
+    """
+    Decodes the raw bytes of a response with orjson, or with the json module of
+    the standard library if orjson is not installed or disabled. Unlike
+    requests.Response.json() it does not guess the charset of the body first.
+    Bodies which can't be decoded this way, e.g. because they are not UTF-8, are
+    handed over to requests.Response.json() as before, which also raises the
+    usual errors for bodies that are no JSON at all.
+    """
+
+    def __init__(self):
+        self.backend = "orjson" if orjson else "json"
+        self._loads = orjson.loads if orjson else json.loads
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        backend = config.get("json_decoder", "auto")
+        if backend not in BACKENDS:
+            logging.warning("Unknown json_decoder %s, using auto", backend)
+            backend = "auto"
+
+        if backend == "orjson" and not orjson:
+            logging.warning("json_decoder orjson is not installed, using json")
+        if backend != "json" and orjson:
+            self.backend, self._loads = "orjson", orjson.loads
+        else:
+            self.backend, self._loads = "json", json.loads
+
+        logging.info("Decoding the BMC responses with %s", self.backend)
+
+    def decode(self, response):
+        """Return the decoded JSON body of a requests.Response."""
+        try:
+            return self._loads(response.content)
+        except ValueError:
+            return response.json()
+
+    def loads(self, body):
+        """Return the decoded JSON of a raw body, e.g. one from the response cache."""
+        try:
+            return self._loads(body)
+        except ValueError:
+            # the json module also detects UTF-16 and UTF-32 bodies
+            return json.loads(body)
+
+
+JSON_DECODER = JsonDecoder()
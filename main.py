@@ -4,27 +4,30 @@ Redfish Prometheus Exporter
 import argparse
 import logging
 import os
+import signal
 import warnings
 import sys
 
-from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
-from socketserver import ThreadingMixIn
 import yaml
 
 import falcon
 
 from handler import MetricsHandler
+from handler import ProbeHandler
+from handler import ExporterMetricsHandler
 from handler import WelcomePage
-
-class _SilentHandler(WSGIRequestHandler):
-    """WSGI handler that does not log requests."""
-
-    def log_message(self, format, *args): # pylint: disable=redefined-builtin
-        """Log nothing."""
-
-
-class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
-    """Thread per request HTTP server."""
+from session_pool import SESSION_POOL
+from transport_pool import TRANSPORT_POOL
+from discovery_cache import DISCOVERY_CACHE
+from response_cache import RESPONSE_CACHE
+from poller import POLLER
+from dns_cache import DNS_CACHE
+from circuit_breaker import BREAKERS
+from json_decoder import JSON_DECODER
+from capability_map import CAPABILITIES
+from recorder import RECORDER
+from collectors.certificate_collector import CERTIFICATE_CACHE
+from server import create_server
 
 def falcon_app(config):
     """
@@ -34,23 +37,86 @@ def falcon_app(config):
     addr = "0.0.0.0"
     logging.info("Starting Redfish Prometheus Server ...")
 
+    SESSION_POOL.configure(config)
+    TRANSPORT_POOL.configure(config)
+    DISCOVERY_CACHE.configure(config)
+    RESPONSE_CACHE.configure(config)
+    CERTIFICATE_CACHE.configure(config)
+    DNS_CACHE.configure(config)
+    BREAKERS.configure(config)
+    JSON_DECODER.configure(config)
+    CAPABILITIES.configure(config)
+    RECORDER.configure(config)
+    POLLER.configure(config)
+
+    engine = os.getenv("ENGINE", config.get("engine", "threaded"))
+    if engine == "async":
+        # the async engine starts the polling once its event loop runs
+        asgi_server(config, addr, port)
+        return
+
+    POLLER.start(config, MetricsHandler)
+
     api = falcon.API()
-    api.add_route("/health",  MetricsHandler(config, metrics_type='health'))
-    api.add_route("/bios",  MetricsHandler(config, metrics_type='bios'))
-    api.add_route("/firmware", MetricsHandler(config, metrics_type='firmware'))
-    api.add_route("/performance", MetricsHandler(config, metrics_type='performance'))
-    api.add_route("/sensors", MetricsHandler(config, metrics_type='sensors'))
-    api.add_route("/", WelcomePage())
-
-    with make_server(addr, port, api, ThreadingWSGIServer, handler_class=_SilentHandler) as httpd:
-        httpd.daemon = True # pylint: disable=attribute-defined-outside-init
+    add_routes(api, config, MetricsHandler, ProbeHandler, ExporterMetricsHandler, WelcomePage)
+
+    with create_server(addr, port, api, config) as httpd:
         logging.info("Listening on Port %s", port)
         try:
             httpd.serve_forever()
         except (KeyboardInterrupt, SystemExit):
             logging.info("Stopping Redfish Prometheus Server")
+            httpd.drain(int(config.get("shutdown_timeout", 30)))
+            POLLER.stop()
+            SESSION_POOL.close_all()
+            TRANSPORT_POOL.close_all()
             sys.exit(0)
 
+def asgi_server(config, addr, port):
+    """
+    Start the Falcon ASGI API with the async engine
+    """
+    # the async engine needs aiohttp and uvicorn, only import them when it is used
+    import uvicorn # pylint: disable=import-outside-toplevel
+    from async_engine import asgi_app # pylint: disable=import-outside-toplevel
+
+    api = asgi_app(config, add_routes)
+    logging.info("Listening on Port %s with the async engine", port)
+    try:
+        uvicorn.run(
+            api,
+            host=addr,
+            port=port,
+            log_config=None,
+            access_log=False,
+            limit_concurrency=int(config.get("server_workers", 64)) + int(config.get("server_queue_size", 128)),
+            timeout_keep_alive=int(config.get("keep_alive_timeout", 15)),
+            timeout_graceful_shutdown=int(config.get("shutdown_timeout", 30)),
+        )
+    finally:
+        logging.info("Stopping Redfish Prometheus Server")
+        POLLER.stop()
+        SESSION_POOL.close_all()
+        TRANSPORT_POOL.close_all()
+
+def add_routes(api, config, metrics_handler, probe_handler, exporter_metrics_handler, welcome_page): # pylint: disable=too-many-arguments
+    """
+    Add the routes of the exporter to the Falcon API
+    """
+    api.add_route("/health",  metrics_handler(config, metrics_type='health'))
+    api.add_route("/bios",  metrics_handler(config, metrics_type='bios'))
+    api.add_route("/firmware", metrics_handler(config, metrics_type='firmware'))
+    api.add_route("/performance", metrics_handler(config, metrics_type='performance'))
+    api.add_route("/sensors", metrics_handler(config, metrics_type='sensors'))
+    api.add_route("/all", metrics_handler(config, metrics_type='all'))
+    api.add_route("/probe", probe_handler(config))
+    api.add_route("/metrics", exporter_metrics_handler())
+    api.add_route("/", welcome_page())
+
+def _sigterm_handler(signum, frame): # pylint: disable=unused-argument
+    """Turn SIGTERM into a regular shutdown so the pooled sessions get cleaned up."""
+    raise SystemExit(0)
+
 def enable_logging(filename, debug):
     """enable logging"""
     logger = logging.getLogger()
@@ -116,6 +182,8 @@ if __name__ == "__main__":
 
     enable_logging(call_args.logging, call_args.debug)
 
+    signal.signal(signal.SIGTERM, _sigterm_handler)
+
     # get the config
 
     if call_args.config:
@@ -0,0 +1,172 @@
+"""Background polling of configured targets, so that scrapes are answered from memory."""
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from exporter_metrics import queued
+
+# polls older than this many intervals are not served anymore
+MAX_AGE_INTERVALS = 2
+
+
+class PollTarget:
+    """One target and module polled in the background."""
+
+    def __init__(self, target, job, module, interval):
+        self.target = target
+        self.job = job
+        self.module = module
+        self.interval = interval
+        self.handler = None
+
+
+class PollResult:
+    """The exposition of the last completed poll of a target and module, and the job it was polled with."""
+
+    def __init__(self, data, completed, job, max_age):
+        self.data = data
+        self.completed = completed
+        self.job = job
+        self.max_age = max_age
+
+    @property
+    def expired(self):
+        """Check if the poll is too old to be served."""
+        return time.time() - self.completed > self.max_age
+
+
+class Poller:
+    """
+    Scrapes the targets listed under poll_targets in the config file in the
+    background and keeps the last completed result of every target and module.
+
+    MetricsHandler answers requests for a polled target from these results, so the
+    latency of a scrape no longer depends on the BMC and the load on the BMC does
+    not depend on how often the exporter is scraped. The first poll of every
+    target is started at a random point within its interval, so that the polls
+    are spread evenly. A poll is skipped while the previous one is still running.
+
+    A result is only served to requests with the job it was polled with, and
+    not anymore once it is older than two poll intervals, e.g. because the
+    later polls failed.
+    """
+
+    def __init__(self):
+        self.targets = []
+        self.workers = 8
+        self._results = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = None
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        interval = int(config.get("poll_interval", 300))
+        self.workers = int(config.get("poll_workers", 8))
+        self.targets = []
+        for entry in config.get("poll_targets") or []:
+            for module in entry.get("modules") or ["health"]:
+                self.targets.append(PollTarget(
+                    entry["target"],
+                    entry.get("job", config.get("job")),
+                    module,
+                    int(entry.get("interval", interval)),
+                ))
+
+        if self.targets:
+            logging.info(
+                "Polling %d targets/modules in the background with %d workers",
+                len(self.targets), self.workers
+            )
+
+    @property
+    def enabled(self):
+        """Check if any targets are polled."""
+        return bool(self.targets)
+
+    def start(self, config, handler_class):
+        """
+        Start polling, the targets are scraped with handler_class.scrape_target(),
+        the MetricsHandler of the configured engine.
+        """
+        if not self.targets:
+            return
+
+        for poll_target in self.targets:
+            poll_target.handler = handler_class(config, metrics_type=poll_target.module)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="poll")
+        threading.Thread(target=self._schedule, name="poller", daemon=True).start()
+
+    def stop(self):
+        """Stop polling and wait for the running polls, used at shutdown."""
+        self._stop.set()
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get(self, target, module, job):
+        """Return the last completed poll of target and module with job, or None."""
+        with self._lock:
+            result = self._results.get((target, module))
+        if result and result.job == job:
+            return result
+        return None
+
+    def _schedule(self):
+        now = time.monotonic()
+        schedule = [
+            (now + random.uniform(0, poll_target.interval), index)
+            for index, poll_target in enumerate(self.targets)
+        ]
+        heapq.heapify(schedule)
+
+        while not self._stop.is_set():
+            due, index = schedule[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+
+            poll_target = self.targets[index]
+            heapq.heapreplace(schedule, (due + poll_target.interval, index))
+
+            key = (poll_target.target, poll_target.module)
+            with self._lock:
+                if key in self._running:
+                    logging.warning(
+                        "Target %s: Previous %s poll still running, skipping this one.",
+                        poll_target.target, poll_target.module
+                    )
+                    continue
+                self._running.add(key)
+
+            try:
+                self._executor.submit(queued("poll", self._poll, poll_target))
+            except RuntimeError:
+                # the executor was shut down by stop()
+                return
+
+    def _poll(self, poll_target):
+        key = (poll_target.target, poll_target.module)
+        try:
+            data = poll_target.handler.scrape_target(poll_target.target, poll_target.job)
+
+        except Exception as e: # pylint: disable=broad-exception-caught
+            logging.error("Target %s: Polling %s failed: %s", poll_target.target, poll_target.module, e)
+
+        else:
+            with self._lock:
+                self._results[key] = PollResult(
+                    data, time.time(), poll_target.job, MAX_AGE_INTERVALS * poll_target.interval
+                )
+
+        finally:
+            with self._lock:
+                self._running.discard(key)
+
+
+POLLER = Poller()
@@ -0,0 +1,75 @@
+"""Recording of the responses of the BMCs, replayed by benchmarks/replay.py."""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+# response headers worth replaying, the others describe the connection
+RECORDED_HEADERS = ("Content-Type", "ETag", "Location", "Allow")
+
+
+class Recorder:
+    """
+    Writes every response connect_server() receives into record_dir, one
+    directory per target with an index.json of the request paths and their
+    status, headers and latency, and the bodies as separate files. A path which
+    is requested again overwrites its earlier recording.
+
+    The recordings contain the data of the servers, e.g. their serial numbers,
+    but neither credentials nor session tokens.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.directory = os.getenv("RECORD_DIR", config.get("record_dir"))
+        if self.directory:
+            logging.warning("Recording all BMC responses to %s", self.directory)
+
+    @property
+    def enabled(self):
+        """Check if responses are recorded."""
+        return bool(self.directory)
+
+    def record(self, target, path, response):
+        """Record the response of a request for path to target."""
+        target_dir = os.path.join(self.directory, re.sub(r"[^\w.-]", "_", target))
+        body = f"{hashlib.sha1(path.encode('utf-8')).hexdigest()}.json"
+        entry = {
+            "status": response.status_code,
+            "headers": {
+                header: response.headers[header]
+                for header in RECORDED_HEADERS if header in response.headers
+            },
+            "latency": round(response.elapsed.total_seconds(), 4),
+            "body": body,
+        }
+
+        with self._lock:
+            index = self._indexes.get(target_dir)
+            if index is None:
+                os.makedirs(target_dir, exist_ok=True)
+                index = self._indexes[target_dir] = self._load(target_dir)
+
+            with open(os.path.join(target_dir, body), "wb") as file:
+                file.write(response.content)
+            index[path] = entry
+            with open(os.path.join(target_dir, "index.json"), "w", encoding="utf-8") as file:
+                json.dump(index, file, indent=1, sort_keys=True)
+
+    @staticmethod
+    def _load(target_dir):
+        try:
+            with open(os.path.join(target_dir, "index.json"), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+
+RECORDER = Recorder()
@@ -0,0 +1,93 @@
+"""Process-wide histogram of the duration of the requests sent to the BMCs."""
+import re
+import threading
+from functools import lru_cache
+
+from prometheus_client.core import HistogramMetricFamily
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# collections whose next path segment is the Id of a member
+COLLECTIONS = {
+    "Systems", "Chassis", "Managers", "Memory", "Processors", "Storage", "Drives",
+    "Volumes", "Controllers", "Sensors", "PowerSupplies", "Fans", "FirmwareInventory",
+    "SoftwareInventory", "NetworkAdapters", "NetworkInterfaces", "NetworkDeviceFunctions",
+    "NetworkPorts", "Ports", "EthernetInterfaces", "Sessions", "Certificates",
+}
+
+ID_RE = re.compile(r"\d")
+
+
+@lru_cache(maxsize=4096)
+def path_template(command):
+    """
+    Return the path of a Redfish URL with the member Ids replaced by {id}, e.g.
+    /redfish/v1/Systems/{id}/Memory/{id} for /redfish/v1/Systems/1/Memory/DIMM.A1.
+    The query string is dropped.
+    """
+    segments = command.split("?", 1)[0].rstrip("/").split("/")
+    template = []
+    for index, segment in enumerate(segments):
+        if segment == "v1":
+            template.append(segment)
+        elif (index > 0 and segments[index - 1] in COLLECTIONS) or ID_RE.search(segment):
+            template.append("{id}")
+        else:
+            template.append(segment)
+
+    return "/".join(template)
+
+
+class RequestDurations:
+    """
+    Histogram of the BMC request durations per target, module, path template and
+    HTTP status. The Ids in the paths are collapsed, so the number of series per
+    target stays bounded by the resource types the exporter reads.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, target, module, command, status, duration):
+        """Count one request of target."""
+        key = (module, path_template(command), str(status))
+        with self._lock:
+            series = self._series.setdefault(target, {})
+            if key not in series:
+                series[key] = [[0] * len(BUCKETS), 0, 0.0]
+
+            buckets, _, _ = entry = series[key]
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            entry[1] += 1
+            entry[2] += duration
+
+    def metrics(self, target, labels, modules=None):
+        """
+        Return the histogram of target, limited to the given modules. labels are
+        added to every series.
+        """
+        histogram = HistogramMetricFamily(
+            "redfish_exporter_bmc_request_duration_seconds",
+            "Redfish Server Monitoring duration of the requests to the BMC",
+            labels = list(labels) + ["module", "path", "status"],
+        )
+
+        with self._lock:
+            series = {key: (list(buckets), count, total)
+                      for key, (buckets, count, total) in self._series.get(target, {}).items()
+                      if modules is None or key[0] in modules}
+
+        for (module, path, status), (buckets, count, total) in sorted(series.items()):
+            histogram.add_metric(
+                list(labels.values()) + [module, path, status],
+                [(str(bound), value) for bound, value in zip(BUCKETS, buckets)] + [("+Inf", count)],
+                total,
+            )
+
+        return histogram
+
+
+REQUEST_DURATIONS = RequestDurations()
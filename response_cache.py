@@ -0,0 +1,114 @@
+"""Process-wide LRU cache of Redfish responses revalidated with ETags."""
+import logging
+import threading
+from collections import OrderedDict
+
+
+class CachedResponse:
+    """The raw body of a Redfish response together with its ETag."""
+
+    def __init__(self, etag, body):
+        self.etag = etag
+        self.body = body
+        self.size = len(body)
+
+
+class ResponseCache:
+    """
+    Keeps the raw bodies of the responses of resources which carry an ETag, keyed
+    by (target, path).
+
+    connect_server() sends the stored ETag as If-None-Match and decodes the stored
+    body when the server answers 304 Not Modified. The cache is bounded by the size
+    of the stored bodies, the least recently used entries are evicted first. Only
+    resources which carry an ETag are counted as hits or misses, the others could
+    not be revalidated anyway.
+    """
+
+    def __init__(self):
+        self.max_bytes = 64 * 1024 * 1024
+        self._size = 0
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.max_bytes = int(config.get("response_cache_size_mb", 64)) * 1024 * 1024
+        logging.info("Response cache size %s bytes", self.max_bytes)
+
+    @property
+    def enabled(self):
+        """Check if the cache may hold any entries."""
+        return self.max_bytes > 0
+
+    @property
+    def size(self):
+        """Return the size of the cached response bodies in bytes."""
+        return self._size
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, target, path):
+        """Return the cached response of path, or None. A miss is counted by put()."""
+        with self._lock:
+            entry = self._entries.get((target, path))
+            if entry:
+                self._entries.move_to_end((target, path))
+                self._count(target, "hits")
+            return entry
+
+    def peek(self, target, path):
+        """Return the cached response of path without counting or reordering it."""
+        with self._lock:
+            return self._entries.get((target, path))
+
+    def put(self, target, path, etag, body):
+        """
+        Store the body of a response with an ETag and evict the least recently used
+        ones if needed. It is counted as a miss if there was no cached response.
+        """
+        with self._lock:
+            old = self._entries.pop((target, path), None)
+            if old:
+                self._size -= old.size
+            else:
+                self._count(target, "misses")
+
+            if len(body) > self.max_bytes:
+                return
+
+            entry = self._entries[(target, path)] = CachedResponse(etag, body)
+            self._size += entry.size
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def not_modified(self, target):
+        """Count a response that was answered with 304 Not Modified."""
+        with self._lock:
+            self._count(target, "not_modified")
+
+    def stats(self, target):
+        """Return the hit/miss/304 counters for target."""
+        with self._lock:
+            return dict(self._stats.get(target, {"hits": 0, "misses": 0, "not_modified": 0}))
+
+    def totals(self):
+        """Return the hit/miss/304 counters summed over all targets."""
+        with self._lock:
+            totals = {"hits": 0, "misses": 0, "not_modified": 0}
+            for stats in self._stats.values():
+                for counter, value in stats.items():
+                    totals[counter] += value
+            return totals
+
+    def _count(self, target, counter):
+        stats = self._stats.setdefault(target, {"hits": 0, "misses": 0, "not_modified": 0})
+        stats[counter] += 1
+
+
+RESPONSE_CACHE = ResponseCache()
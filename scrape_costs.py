@@ -0,0 +1,143 @@
+"""Process-wide accounting of what the scrapes cost the BMCs."""
+import threading
+
+from prometheus_client.core import CounterMetricFamily
+
+
+class _Costs:
+    """The counters of one target and module."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.json_seconds = 0.0
+        self.auth = {}
+        self.failed = {}
+
+
+def status_class(status, responded):
+    """
+    Return the class of a failed request: 4xx or 5xx for error responses,
+    timeout, connection or error for requests without a response.
+    """
+    if not responded:
+        return {408: "timeout", 444: "connection"}.get(status, "error")
+    return f"{status // 100}xx"
+
+
+class ScrapeCosts:
+    """
+    Counts per target and module the requests sent to the BMC, the bytes of
+    their responses, the time spent decoding them, the session logins and
+    logouts and basic auth fallbacks, and the failed requests by status class.
+    Requests answered without sending them, e.g. from the responses of the same
+    scrape, are not counted.
+    """
+
+    def __init__(self):
+        self._costs = {}
+        self._lock = threading.Lock()
+
+    def request(self, target, module, status, size, responded):
+        """Count one request sent to target."""
+        with self._lock:
+            costs = self._entry(target, module)
+            costs.requests += 1
+            costs.bytes += size
+            if not responded or status >= 400:
+                failure = status_class(status, responded)
+                costs.failed[failure] = costs.failed.get(failure, 0) + 1
+
+    def json_parsed(self, target, module, seconds):
+        """Add the time spent decoding a response of target."""
+        with self._lock:
+            self._entry(target, module).json_seconds += seconds
+
+    def auth(self, target, module, operation):
+        """Count a login, logout or basic_auth fallback of target."""
+        with self._lock:
+            costs = self._entry(target, module)
+            costs.auth[operation] = costs.auth.get(operation, 0) + 1
+
+    def metrics(self, target, modules, labels):
+        """Yield the counters of the modules of target, labels are added to every series."""
+        with self._lock:
+            costs = {
+                module: self._copy(self._costs[(target, module)])
+                for module in modules if (target, module) in self._costs
+            }
+        yield from self._families("redfish_bmc", costs, labels)
+
+    def collect(self):
+        """Yield the counters summed over all targets per module, used by /metrics."""
+        totals = {}
+        with self._lock:
+            for (_, module), costs in self._costs.items():
+                total = totals.setdefault(module, _Costs())
+                total.requests += costs.requests
+                total.bytes += costs.bytes
+                total.json_seconds += costs.json_seconds
+                for operation, value in costs.auth.items():
+                    total.auth[operation] = total.auth.get(operation, 0) + value
+                for failure, value in costs.failed.items():
+                    total.failed[failure] = total.failed.get(failure, 0) + value
+        yield from self._families("redfish_exporter_bmc", totals, {})
+
+    @staticmethod
+    def _families(prefix, costs, labels):
+        names = list(labels) + ["module"]
+        values = list(labels.values())
+
+        requests = CounterMetricFamily(
+            f"{prefix}_requests", "Requests sent to the BMC", labels = names
+        )
+        response_bytes = CounterMetricFamily(
+            f"{prefix}_response_bytes", "Bytes of the responses received from the BMC", labels = names
+        )
+        json_seconds = CounterMetricFamily(
+            f"{prefix}_json_parse_seconds", "Time spent decoding the responses of the BMC", labels = names
+        )
+        auth = CounterMetricFamily(
+            f"{prefix}_auth_operations",
+            "Session logins and logouts and basic auth fallbacks at the BMC",
+            labels = names + ["operation"],
+        )
+        failed = CounterMetricFamily(
+            f"{prefix}_failed_requests",
+            "Requests to the BMC which failed, by status class",
+            labels = names + ["status_class"],
+        )
+
+        for module, entry in sorted(costs.items()):
+            requests.add_metric(values + [module], entry.requests)
+            response_bytes.add_metric(values + [module], entry.bytes)
+            json_seconds.add_metric(values + [module], entry.json_seconds)
+            for operation, value in sorted(entry.auth.items()):
+                auth.add_metric(values + [module, operation], value)
+            for failure, value in sorted(entry.failed.items()):
+                failed.add_metric(values + [module, failure], value)
+
+        yield requests
+        yield response_bytes
+        yield json_seconds
+        yield auth
+        yield failed
+
+    def _entry(self, target, module):
+        costs = self._costs.get((target, module))
+        if costs is None:
+            costs = self._costs[(target, module)] = _Costs()
+        return costs
+
+    @staticmethod
+    def _copy(costs):
+        copy = _Costs()
+        copy.requests = costs.requests
+        copy.bytes = costs.bytes
+        copy.json_seconds = costs.json_seconds
+        copy.auth = dict(costs.auth)
+        copy.failed = dict(costs.failed)
+        return copy
+
+
+SCRAPE_COSTS = ScrapeCosts()
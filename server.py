@@ -0,0 +1,256 @@
+"""Bounded, keep-alive capable WSGI server for the threaded engine."""
+import logging
+import queue
+import selectors
+import threading
+import time
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+# seconds a client is asked to wait when the server is saturated
+RETRY_AFTER = 5
+
+# rejected connections waiting for their 503, further ones are closed right away
+REJECT_BACKLOG = 64
+
+BUSY_RESPONSE = (
+    "HTTP/1.1 503 Service Unavailable\r\n"
+    f"Retry-After: {RETRY_AFTER}\r\n"
+    "Content-Length: 0\r\n"
+    "Connection: close\r\n"
+    "\r\n"
+).encode("latin-1")
+
+
+class KeepAliveServerHandler(ServerHandler):
+    """
+    WSGI handler answering with HTTP/1.1, so that clients can keep the connection
+    open. Streamed responses without a length are sent with chunked encoding.
+    """
+
+    http_version = "1.1"
+    chunked = False
+
+    def cleanup_headers(self):
+        """Close the connection if the client asks for it or the response has no length."""
+        super().cleanup_headers()
+        if "Content-Length" not in self.headers:
+            if self.request_handler.request_version == "HTTP/1.1":
+                self.headers["Transfer-Encoding"] = "chunked"
+                self.chunked = True
+            else:
+                # without a length the end of the body can only be marked by closing the connection
+                self.request_handler.close_connection = True
+        if self.request_handler.close_connection:
+            self.headers["Connection"] = "close"
+
+    def write(self, data):
+        """Send data, as one chunk of a chunked response."""
+        if not self.headers_sent:
+            # the length of a single block response is taken from its first write
+            self.bytes_sent = len(data)
+            self.send_headers()
+            self.bytes_sent = 0
+
+        if self.chunked:
+            # an empty chunk would end the body
+            if not data:
+                return
+            data = b"%x\r\n%s\r\n" % (len(data), data)
+
+        super().write(data)
+
+    def finish_content(self):
+        """Send the last chunk of a chunked response."""
+        if self.chunked:
+            self._write(b"0\r\n\r\n")
+            self._flush()
+        else:
+            super().finish_content()
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Handles one request of a connection and does not log it."""
+
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+
+    def handle(self):
+        """Handle a single HTTP request."""
+        self.close_connection = True
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ""
+            self.request_version = ""
+            self.command = ""
+            self.send_error(414)
+            return
+
+        # an empty request line means that the client closed the connection
+        if not self.parse_request():
+            return
+
+        handler = KeepAliveServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        """Log nothing."""
+
+
+class BoundedWSGIServer(WSGIServer):
+    """
+    WSGI server with a fixed pool of worker threads and a bounded queue of
+    accepted connections.
+
+    At most workers + queue_size requests are admitted at a time, running or
+    waiting for a worker, so with a queue_size of 0 a request is only admitted
+    if a worker is free. Further requests are answered with 503 and Retry-After
+    by a separate thread instead of waiting. Connections kept alive by the client
+    are watched by one thread while they are idle and queued again for the
+    next request, so they don't block a worker. drain() stops accepting new
+    connections and waits for the queued and running requests.
+    """
+
+    def __init__(self, server_address, handler_class, workers, queue_size, keep_alive_timeout): # pylint: disable=too-many-arguments
+        if workers < 1 or queue_size < 0:
+            raise ValueError(
+                f"server_workers must be at least 1 and server_queue_size at least 0, got {workers} and {queue_size}"
+            )
+
+        super().__init__(server_address, handler_class)
+        self.keep_alive_timeout = keep_alive_timeout
+        self.capacity = workers + queue_size
+        self._admitted = 0
+        self._admitted_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._rejected = queue.Queue(maxsize=REJECT_BACKLOG)
+        self._idle = {}
+        self._idle_lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._stopping = threading.Event()
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"http-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        threading.Thread(target=self._watch_idle, name="http-keepalive", daemon=True).start()
+        threading.Thread(target=self._answer_rejected, name="http-busy", daemon=True).start()
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker, or reject it if the server is saturated."""
+        self._dispatch(request, client_address)
+
+    def drain(self, timeout):
+        """Stop accepting connections and wait up to timeout seconds for the running requests."""
+        logging.info("Waiting up to %s seconds for the running requests", timeout)
+        self._stopping.set()
+        self.server_close()
+
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0, deadline - time.monotonic()))
+
+        with self._idle_lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for request in idle:
+            self.shutdown_request(request)
+
+    def admit(self):
+        """Admit a request if the workers and the queue have room for it."""
+        with self._admitted_lock:
+            if self._admitted >= self.capacity:
+                return False
+            self._admitted += 1
+            return True
+
+    def release(self):
+        """Release the admission of a request that was handled."""
+        with self._admitted_lock:
+            self._admitted -= 1
+
+    def _dispatch(self, request, client_address):
+        if self.admit():
+            self._queue.put((request, client_address))
+            return
+
+        logging.warning("Server busy, rejecting request from %s", client_address[0])
+        try:
+            self._rejected.put_nowait(request)
+        except queue.Full:
+            self.shutdown_request(request)
+
+    def _answer_rejected(self):
+        # runs apart from the accepting thread, which must not wait for slow clients
+        while True:
+            request = self._rejected.get()
+            try:
+                # read the request, closing a socket with unread data would reset the connection
+                request.settimeout(0.1)
+                request.recv(65536)
+                request.sendall(BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            try:
+                request, client_address = self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            keep_alive = False
+            try:
+                handler = self.RequestHandlerClass(request, client_address, self)
+                keep_alive = not handler.close_connection and not self._stopping.is_set()
+            except Exception: # pylint: disable=broad-exception-caught
+                self.handle_error(request, client_address)
+            finally:
+                self.release()
+
+            if keep_alive:
+                with self._idle_lock:
+                    self._idle[request] = (client_address, time.monotonic())
+                    self._selector.register(request, selectors.EVENT_READ)
+            else:
+                self.shutdown_request(request)
+
+    def _watch_idle(self):
+        while not self._stopping.is_set():
+            events = self._selector.select(timeout=1)
+            now = time.monotonic()
+            with self._idle_lock:
+                ready = [key.fileobj for key, _ in events if key.fileobj in self._idle]
+                expired = [
+                    request for request, (_, since) in self._idle.items()
+                    if request not in ready and now - since > self.keep_alive_timeout
+                ]
+                parked = {request: self._idle.pop(request) for request in ready + expired}
+                for request in parked:
+                    self._selector.unregister(request)
+
+            for request in ready:
+                self._dispatch(request, parked[request][0])
+            for request in expired:
+                self.shutdown_request(request)
+
+
+def create_server(addr, port, app, config):
+    """Create the bounded server with the settings from the config file."""
+    httpd = BoundedWSGIServer(
+        (addr, port),
+        KeepAliveRequestHandler,
+        workers = int(config.get("server_workers", 64)),
+        queue_size = int(config.get("server_queue_size", 128)),
+        keep_alive_timeout = int(config.get("keep_alive_timeout", 15)),
+    )
+    httpd.set_app(app)
+    return httpd
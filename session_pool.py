@@ -0,0 +1,152 @@
+"""Process-wide pool of Redfish sessions that are kept alive across scrapes."""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class PooledSession:
+    """A Redfish session (X-Auth-Token) owned by the pool."""
+
+    def __init__(self, token, session_url):
+        self.token = token
+        self.session_url = session_url
+        self.last_used = time.time()
+
+
+class SessionPool:
+    """
+    Keeps one Redfish session per (target, credentials) alive across scrapes
+    and shares it between all endpoint handlers.
+
+    Logins for the same key are serialized with a per-key lock, so that
+    concurrent scrapes of one BMC never open more than one session. Sessions
+    which were idle for session_idle_timeout seconds are dropped and deleted on
+    their BMC in the background, so that a slow BMC never stalls a scrape.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.idle_timeout = 600
+        self._timeout = 10
+        self._sessions = {}
+        self._key_locks = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.enabled = bool(config.get("session_pool", True))
+        self.idle_timeout = int(config.get("session_idle_timeout", 600))
+        self._timeout = int(os.getenv("TIMEOUT", config.get('timeout', 10)))
+        logging.info(
+            "Session pool %s, idle timeout %s seconds",
+            "enabled" if self.enabled else "disabled", self.idle_timeout
+        )
+
+    def lock(self, key):
+        """Return the lock serializing logins for the given key."""
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def get(self, key):
+        """Return the pooled session for key, or None if there is no usable one."""
+        expired = self._pop_idle()
+        if expired:
+            executor = self._delete_executor()
+            for session in expired:
+                executor.submit(self._delete, session)
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session:
+                session.last_used = time.time()
+                self._count(key, "reuses")
+            return session
+
+    def put(self, key, token, session_url, relogin=False):
+        """Store a freshly created session."""
+        with self._lock:
+            self._sessions[key] = PooledSession(token, session_url)
+            self._count(key, "logins")
+            if relogin:
+                self._count(key, "relogins")
+
+    def release(self, key):
+        """Mark the session for key as used at the end of a scrape."""
+        with self._lock:
+            session = self._sessions.get(key)
+            if session:
+                session.last_used = time.time()
+
+    def invalidate(self, key, token):
+        """Drop the pooled session for key if it still holds the given token."""
+        with self._lock:
+            session = self._sessions.get(key)
+            if session and session.token == token:
+                del self._sessions[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self, key):
+        """Return the login/reuse counters for key."""
+        with self._lock:
+            return dict(self._stats.get(key, {"logins": 0, "reuses": 0, "relogins": 0}))
+
+    def close_all(self):
+        """Delete all pooled sessions on the BMCs, used at shutdown."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        logging.info("Deleting %d pooled Redfish sessions", len(sessions))
+        for session in sessions:
+            self._delete(session)
+
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _count(self, key, counter):
+        stats = self._stats.setdefault(key, {"logins": 0, "reuses": 0, "relogins": 0})
+        stats[counter] += 1
+
+    def _pop_idle(self):
+        now = time.time()
+        with self._lock:
+            idle = [
+                key for key, session in self._sessions.items()
+                if now - session.last_used > self.idle_timeout
+            ]
+            return [self._sessions.pop(key) for key in idle]
+
+    def _delete_executor(self):
+        with self._lock:
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="logout")
+            return self._executor
+
+    def _delete(self, session):
+        logging.debug("Deleting pooled Redfish session %s", session.session_url)
+        try:
+            response = requests.delete(
+                session.session_url,
+                verify=False,
+                timeout=self._timeout,
+                headers={"x-auth-token": session.token}
+            )
+            response.close()
+
+        except requests.exceptions.RequestException as e:
+            logging.warning("Error deleting session %s: %s", session.session_url, e)
+
+
+SESSION_POOL = SessionPool()
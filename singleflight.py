@@ -0,0 +1,132 @@
+"""Coalescing of concurrent identical calls."""
+import threading
+
+
+class _Call:
+    """A call in flight, the items it produced so far and its outcome."""
+
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.items = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Runs a function returning an iterator only once for concurrent calls with the
+    same key. Callers arriving while the call is in flight get the same items as
+    they are produced, starting with the ones produced before they arrived, and
+    the same exception. The items are kept until the call has finished, nothing
+    is kept after that. If the first caller stops reading while others share the
+    call, the call is finished in the background for them.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key, func, *args, deadline=None, joined=None):
+        """
+        Yield the items of func(*args), or the items of the call with the same key
+        in flight. The call is only registered once the iteration starts, and
+        removed when it ends or the iterator is closed. joined is called if this
+        caller shares a call in flight. Such a caller waits for the next item at
+        most until its own deadline and raises TimeoutError after that.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            try:
+                if joined:
+                    joined()
+                yield from self._follow(call, deadline)
+            finally:
+                with self._lock:
+                    call.followers -= 1
+            return
+
+        iterator = iter(func(*args))
+        handed_off = False
+        try:
+            for item in iterator:
+                self._publish(call, item)
+                yield item
+
+        except Exception as err:
+            call.error = err
+            raise
+
+        except GeneratorExit:
+            # the leader's caller stopped reading, the callers sharing the call still need the rest
+            handed_off = self._hand_off(key, call, iterator)
+            if not handed_off:
+                iterator.close()
+            raise
+
+        finally:
+            if not handed_off:
+                self._end(key, call)
+
+    def _hand_off(self, key, call, iterator):
+        with self._lock:
+            if not call.followers:
+                return False
+
+        threading.Thread(
+            target=self._finish, args=(key, call, iterator), name="singleflight", daemon=True
+        ).start()
+        return True
+
+    def _finish(self, key, call, iterator):
+        try:
+            for item in iterator:
+                self._publish(call, item)
+
+        except Exception as err: # pylint: disable=broad-exception-caught
+            call.error = err
+
+        finally:
+            self._end(key, call)
+
+    @staticmethod
+    def _publish(call, item):
+        with call.changed:
+            call.items.append(item)
+            call.changed.notify_all()
+
+    def _end(self, key, call):
+        with self._lock:
+            del self._calls[key]
+        with call.changed:
+            call.done = True
+            call.changed.notify_all()
+
+    @staticmethod
+    def _follow(call, deadline):
+        index = 0
+        while True:
+            with call.changed:
+                ready = call.changed.wait_for(
+                    lambda seen=index: len(call.items) > seen or call.done,
+                    deadline.remaining() if deadline else None
+                )
+                if not ready:
+                    raise TimeoutError("The shared call did not finish before the deadline.")
+                items = call.items[index:]
+                done = call.done
+
+            yield from items
+            index += len(items)
+
+            if done:
+                if call.error:
+                    raise call.error
+                return
@@ -0,0 +1,37 @@
+from collectors.bios_collector import BiosCollector
+
+
+class Collector:
+    def __init__(self, systems):
+        self.target = "bmc"
+        self.manufacturer = "Lenovo"
+        self.model = "ThinkSystem SR650"
+        self.labels = {"host": "bmc"}
+        self._responses = {"/redfish/v1/Systems": {"Members": []}}
+        for index, attributes in enumerate(systems):
+            system_url = f"/redfish/v1/Systems/{index}"
+            self._responses["/redfish/v1/Systems"]["Members"].append({"@odata.id": system_url})
+            self._responses[system_url] = {"Bios": {"@odata.id": f"{system_url}/Bios"}, "BiosVersion": "1.0"}
+            self._responses[f"{system_url}/Bios"] = {"Attributes": attributes}
+
+    def connect_server(self, command):
+        return self._responses.get(command)
+
+
+def boot_mode_labels(col):
+    return [
+        sample.labels
+        for family in BiosCollector(col).collect()
+        for sample in family.samples
+        if family.name == "redfish_bios_boot_mode"
+    ]
+
+
+def test_systems_of_a_target_keep_their_own_labels():
+    col = Collector([{"BootMode": "Uefi"}, {"BootMode": "Legacy"}])
+    first = boot_mode_labels(col)
+    assert [labels["setting_value"] for labels in first] == ["Uefi", "Legacy"]
+
+    # the labels merged for one System are not replaced by the ones of the other
+    second = boot_mode_labels(col)
+    assert all(old is new for old, new in zip(first, second))
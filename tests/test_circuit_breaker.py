@@ -0,0 +1,76 @@
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakers
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def breakers(monkeypatch, failures=3, cooldown=60):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    result = CircuitBreakers()
+    result.configure({"breaker_failures": failures, "breaker_cooldown": cooldown})
+    return result, clock
+
+
+def test_opens_after_consecutive_failures(monkeypatch):
+    cb, _ = breakers(monkeypatch)
+    cb.record("bmc", True)
+    cb.record("bmc", True)
+    assert cb.state("bmc") == CLOSED and cb.allow("bmc")
+
+    cb.record("bmc", True)
+    assert cb.state("bmc") == OPEN
+    assert not cb.allow("bmc")
+    assert cb.allow("other")
+    assert cb.count_open() == 1
+
+
+def test_success_resets_the_failures(monkeypatch):
+    cb, _ = breakers(monkeypatch)
+    cb.record("bmc", True)
+    cb.record("bmc", True)
+    cb.record("bmc", False)
+    cb.record("bmc", True)
+    assert cb.state("bmc") == CLOSED
+
+
+def test_half_open_after_cooldown_closes_on_success(monkeypatch):
+    cb, clock = breakers(monkeypatch)
+    for _ in range(3):
+        cb.record("bmc", True)
+
+    clock.now += 59
+    assert not cb.allow("bmc")
+    clock.now += 2
+    assert cb.allow("bmc")
+    assert cb.state("bmc") == HALF_OPEN
+
+    cb.record("bmc", False)
+    assert cb.state("bmc") == CLOSED
+    assert cb.count_open() == 0
+
+
+def test_failed_probe_opens_again(monkeypatch):
+    cb, clock = breakers(monkeypatch)
+    for _ in range(3):
+        cb.record("bmc", True)
+    clock.now += 61
+    assert cb.allow("bmc")
+
+    cb.record("bmc", True)
+    assert cb.state("bmc") == OPEN
+    assert not cb.allow("bmc")
+
+
+def test_disabled(monkeypatch):
+    cb, _ = breakers(monkeypatch, failures=0)
+    for _ in range(10):
+        cb.record("bmc", True)
+    assert cb.allow("bmc")
+    assert cb.state("bmc") == CLOSED
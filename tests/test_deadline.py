@@ -0,0 +1,37 @@
+import time
+
+from deadline import TIMEOUT_HEADER, Deadline
+
+
+class Request:
+    def __init__(self, headers):
+        self._headers = headers
+
+    def get_header(self, name):
+        return self._headers.get(name)
+
+
+def test_remaining_counts_down_to_zero():
+    deadline = Deadline(0.05)
+    assert 0 < deadline.remaining() <= 0.05
+    assert not deadline.expired
+
+    time.sleep(0.06)
+    assert deadline.remaining() == 0
+    assert deadline.expired
+
+
+def test_from_request_subtracts_the_offset():
+    deadline = Deadline.from_request(Request({TIMEOUT_HEADER: "10"}), 0.5)
+    assert deadline.timeout == 9.5
+
+
+def test_from_request_never_goes_below_zero():
+    deadline = Deadline.from_request(Request({TIMEOUT_HEADER: "0.2"}), 0.5)
+    assert deadline.timeout == 0
+    assert deadline.expired
+
+
+def test_from_request_without_or_with_invalid_header():
+    assert Deadline.from_request(Request({}), 0.5) is None
+    assert Deadline.from_request(Request({TIMEOUT_HEADER: "soon"}), 0.5) is None
@@ -0,0 +1,104 @@
+import socket
+
+import pytest
+
+import dns_cache
+from dns_cache import DnsCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Resolver:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def gethostbyname(self, host):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return f"192.0.2.{self.calls}"
+
+
+def wait_for_refreshes(cache):
+    cache._executor.shutdown(wait=True)
+    cache._executor = None
+
+
+@pytest.fixture(name="setup")
+def fixture_setup(monkeypatch):
+    clock = Clock()
+    resolver = Resolver()
+    monkeypatch.setattr(dns_cache.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(socket, "gethostbyname", resolver.gethostbyname)
+    cache = DnsCache()
+    cache.configure({"dns_cache_ttl": 300, "dns_negative_ttl": 30})
+    return cache, clock, resolver
+
+
+def test_hits_until_expired(setup):
+    cache, clock, resolver = setup
+    assert cache.gethostbyname("bmc") == "192.0.2.1"
+    clock.now += 200
+    assert cache.gethostbyname("bmc") == "192.0.2.1"
+    assert resolver.calls == 1
+
+    clock.now += 101
+    assert cache.gethostbyname("bmc") == "192.0.2.2"
+    assert resolver.calls == 2
+    assert cache._stats["hits"] == 1 and cache._stats["misses"] == 2
+
+
+def test_failures_are_cached_for_the_negative_ttl(setup):
+    cache, clock, resolver = setup
+    resolver.error = socket.gaierror(-2, "Name or service not known")
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.gethostbyname("bmc")
+    assert resolver.calls == 1
+    assert cache._stats["negative_hits"] == 1
+
+    resolver.error = None
+    clock.now += 31
+    assert cache.gethostbyname("bmc") == "192.0.2.2"
+
+
+def test_refreshes_ahead_of_expiry(setup):
+    cache, clock, resolver = setup
+    cache.gethostbyname("bmc")
+    clock.now += 250
+    assert cache.gethostbyname("bmc") == "192.0.2.1"
+    wait_for_refreshes(cache)
+
+    assert resolver.calls == 2
+    assert cache._stats["refreshes"] == 1
+    clock.now += 100
+    assert cache.gethostbyname("bmc") == "192.0.2.2"
+    assert resolver.calls == 2
+
+
+def test_failed_refresh_keeps_the_result(setup):
+    cache, clock, resolver = setup
+    cache.gethostbyname("bmc")
+    resolver.error = socket.gaierror(-3, "Temporary failure in name resolution")
+    clock.now += 250
+    assert cache.gethostbyname("bmc") == "192.0.2.1"
+    wait_for_refreshes(cache)
+
+    clock.now += 40
+    assert cache.gethostbyname("bmc") == "192.0.2.1"
+
+
+def test_disabled(setup):
+    cache, _, resolver = setup
+    cache.ttl = 0
+    cache.gethostbyname("bmc")
+    cache.gethostbyname("bmc")
+    assert resolver.calls == 2
+    assert len(cache) == 0
@@ -0,0 +1,46 @@
+import time
+
+from poller import PollTarget, Poller
+
+
+class Handler:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def scrape_target(self, target, job):
+        if self.fail:
+            raise RuntimeError("poll failed")
+        return f"{target} {job}".encode()
+
+
+def poller_with(poll_target, handler):
+    poller = Poller()
+    poll_target.handler = handler
+    poller.targets = [poll_target]
+    return poller
+
+
+def test_result_only_served_to_its_job():
+    poll_target = PollTarget("bmc", "redfish", "health", 60)
+    poller = poller_with(poll_target, Handler())
+    poller._poll(poll_target)
+
+    assert poller.get("bmc", "health", "redfish").data == b"bmc redfish"
+    assert poller.get("bmc", "health", "other") is None
+    assert poller.get("bmc", "firmware", "redfish") is None
+
+
+def test_failed_polls_expire_the_last_result():
+    poll_target = PollTarget("bmc", "redfish", "health", 60)
+    handler = Handler()
+    poller = poller_with(poll_target, handler)
+    poller._poll(poll_target)
+    result = poller.get("bmc", "health", "redfish")
+    assert not result.expired
+
+    handler.fail = True
+    poller._poll(poll_target)
+    assert poller.get("bmc", "health", "redfish") is result
+
+    result.completed = time.time() - 121
+    assert result.expired
@@ -0,0 +1,42 @@
+from request_metrics import RequestDurations, path_template
+
+
+def test_member_ids_of_collections_are_collapsed():
+    assert path_template("/redfish/v1/Systems/System.Embedded.1/Memory/DIMM.Socket.A1") == \
+        "/redfish/v1/Systems/{id}/Memory/{id}"
+    assert path_template("/redfish/v1/Chassis/1U/Power") == "/redfish/v1/Chassis/{id}/Power"
+
+
+def test_segments_with_digits_are_collapsed_outside_collections():
+    assert path_template("/redfish/v1/Systems/1/Bios/Settings/abc123") == \
+        "/redfish/v1/Systems/{id}/Bios/Settings/{id}"
+
+
+def test_version_query_and_trailing_slash():
+    assert path_template("/redfish/v1/") == "/redfish/v1"
+    assert path_template("/redfish/v1/Systems?$expand=.($levels=1)") == "/redfish/v1/Systems"
+    assert path_template("/redfish/v1/Systems/1/Processors?$expand=.($levels=1)") == \
+        "/redfish/v1/Systems/{id}/Processors"
+
+
+def test_collection_names_themselves_are_kept():
+    assert path_template("/redfish/v1/Systems/1/Storage/RAID.1/Drives") == \
+        "/redfish/v1/Systems/{id}/Storage/{id}/Drives"
+
+
+def test_histogram_is_limited_to_the_modules():
+    durations = RequestDurations()
+    durations.observe("bmc", "health", "/redfish/v1/Systems/1", 200, 0.2)
+    durations.observe("bmc", "health", "/redfish/v1/Systems/2", 200, 0.7)
+    durations.observe("bmc", "firmware", "/redfish/v1/UpdateService", 200, 0.1)
+
+    health = durations.metrics("bmc", {"host": "bmc"}, ["health"])
+    counts = {sample.labels["le"]: sample.value for sample in health.samples
+              if sample.name.endswith("_bucket")}
+    assert {sample.labels["module"] for sample in health.samples} == {"health"}
+    assert counts["0.25"] == 1
+    assert counts["1.0"] == 2
+    assert counts["+Inf"] == 2
+
+    every = durations.metrics("bmc", {"host": "bmc"})
+    assert {sample.labels["module"] for sample in every.samples} == {"health", "firmware"}
@@ -0,0 +1,28 @@
+from response_cache import ResponseCache
+
+
+def test_only_resources_with_an_etag_are_counted():
+    cache = ResponseCache()
+    assert cache.get("bmc", "/redfish/v1/Systems/1") is None
+    assert cache.stats("bmc") == {"hits": 0, "misses": 0, "not_modified": 0}
+
+    cache.put("bmc", "/redfish/v1/Systems/1", '"1"', b'{"Id": "1"}')
+    assert cache.stats("bmc")["misses"] == 1
+    assert cache.get("bmc", "/redfish/v1/Systems/1").body == b'{"Id": "1"}'
+
+    # a changed resource replaces the cached one without another miss
+    cache.put("bmc", "/redfish/v1/Systems/1", '"2"', b'{"Id": "2"}')
+    assert cache.stats("bmc") == {"hits": 1, "misses": 1, "not_modified": 0}
+
+
+def test_bounded_by_the_stored_bodies():
+    cache = ResponseCache()
+    cache.max_bytes = 100
+    cache.put("bmc", "/a", '"a"', b"x" * 60)
+    cache.put("bmc", "/b", '"b"', b"x" * 60)
+    assert len(cache) == 1 and cache.size == 60
+    assert cache.peek("bmc", "/a") is None
+
+    cache.put("bmc", "/c", '"c"', b"x" * 101)
+    assert cache.peek("bmc", "/c") is None
+    assert cache.size == 60
@@ -0,0 +1,40 @@
+from scrape_costs import ScrapeCosts, status_class
+
+
+def samples(families):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in families for sample in family.samples
+    }
+
+
+def test_status_classes():
+    assert status_class(404, True) == "4xx"
+    assert status_class(503, True) == "5xx"
+    assert status_class(408, False) == "timeout"
+    assert status_class(444, False) == "connection"
+    assert status_class(500, False) == "error"
+
+
+def test_costs_per_module_and_totals():
+    costs = ScrapeCosts()
+    costs.request("bmc", "health", 200, 100, True)
+    costs.request("bmc", "health", 404, 20, True)
+    costs.request("bmc", "firmware", 408, 0, False)
+    costs.auth("bmc", "health", "login")
+    costs.auth("bmc", "health", "logout")
+    costs.request("other", "health", 200, 50, True)
+
+    target = samples(costs.metrics("bmc", ["health"], {"host": "bmc"}))
+    assert target[("redfish_bmc_requests_total", (("host", "bmc"), ("module", "health")))] == 2
+    assert target[("redfish_bmc_response_bytes_total", (("host", "bmc"), ("module", "health")))] == 120
+    assert target[("redfish_bmc_auth_operations_total",
+                   (("host", "bmc"), ("module", "health"), ("operation", "logout")))] == 1
+    assert target[("redfish_bmc_failed_requests_total",
+                   (("host", "bmc"), ("module", "health"), ("status_class", "4xx")))] == 1
+    assert all(dict(labels)["module"] == "health" for _, labels in target)
+
+    totals = samples(costs.collect())
+    assert totals[("redfish_exporter_bmc_requests_total", (("module", "health"),))] == 3
+    assert totals[("redfish_exporter_bmc_failed_requests_total",
+                   (("module", "firmware"), ("status_class", "timeout")))] == 1
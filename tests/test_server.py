@@ -0,0 +1,73 @@
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server import BoundedWSGIServer, KeepAliveRequestHandler
+
+
+def slow_app(environ, start_response): # pylint: disable=unused-argument
+    time.sleep(0.3)
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "2")])
+    return [b"ok"]
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(workers, queue_size):
+        httpd = BoundedWSGIServer(("127.0.0.1", 0), KeepAliveRequestHandler, workers, queue_size, 1)
+        httpd.set_app(slow_app)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd.server_address[1]
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.drain(1)
+
+
+def burst(port, count):
+    def get(_):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", "/")
+        status = connection.getresponse().status
+        connection.close()
+        return status
+
+    with ThreadPoolExecutor(count) as executor:
+        return sorted(executor.map(get, range(count)))
+
+
+def test_idle_workers_count_towards_the_capacity(serve):
+    assert burst(serve(4, 2), 3) == [200, 200, 200]
+
+
+def test_requests_beyond_workers_and_queue_are_rejected(serve):
+    assert burst(serve(2, 1), 5) == [200, 200, 200, 503, 503]
+
+
+def test_queue_size_zero_admits_only_with_a_free_worker(serve):
+    assert burst(serve(1, 0), 2) == [200, 503]
+
+
+def test_admissions_are_released_after_the_request():
+    httpd = BoundedWSGIServer(("127.0.0.1", 0), KeepAliveRequestHandler, 1, 0, 1)
+    try:
+        assert httpd.admit()
+        assert not httpd.admit()
+        httpd.release()
+        assert httpd.admit()
+    finally:
+        httpd.server_close()
+
+
+def test_invalid_sizes_are_refused():
+    with pytest.raises(ValueError):
+        BoundedWSGIServer(("127.0.0.1", 0), KeepAliveRequestHandler, 4, -1, 1)
+    with pytest.raises(ValueError):
+        BoundedWSGIServer(("127.0.0.1", 0), KeepAliveRequestHandler, 0, 4, 1)
@@ -0,0 +1,28 @@
+import threading
+import time
+
+from session_pool import SessionPool
+
+
+def test_idle_sessions_are_deleted_in_the_background(monkeypatch):
+    pool = SessionPool()
+    release = threading.Event()
+    deleted = []
+
+    def slow_delete(session):
+        release.wait(5)
+        deleted.append(session.token)
+
+    monkeypatch.setattr(pool, "_delete", slow_delete)
+    pool.put(("dead-bmc", "user"), "old", "https://dead-bmc/redfish/v1/SessionService/Sessions/1")
+    pool.put(("bmc", "user"), "token", "https://bmc/redfish/v1/SessionService/Sessions/1")
+    pool._sessions[("dead-bmc", "user")].last_used = time.time() - pool.idle_timeout - 1
+
+    start = time.monotonic()
+    assert pool.get(("bmc", "user")).token == "token"
+    assert pool.get(("dead-bmc", "user")) is None
+    assert time.monotonic() - start < 1
+
+    release.set()
+    pool.close_all()
+    assert sorted(deleted) == ["old", "token"]
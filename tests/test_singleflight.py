@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline
+from singleflight import SingleFlight
+
+
+def produce(started, release, items):
+    started.set()
+    for item in items:
+        release.wait(5)
+        yield item
+
+
+def test_concurrent_caller_shares_the_items():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    release.set()
+    joined = []
+
+    leader = flights.stream("key", produce, started, release, [1, 2, 3])
+    assert next(leader) == 1
+    follower = flights.stream("key", produce, started, release, [4], joined = lambda: joined.append(1))
+    assert next(follower) == 1
+
+    assert list(leader) == [2, 3]
+    assert list(follower) == [2, 3]
+    assert joined == [1]
+
+
+def test_call_is_not_registered_before_the_iteration_starts():
+    flights = SingleFlight()
+    calls = []
+
+    def func():
+        calls.append(1)
+        yield "item"
+
+    # a stream which is never iterated must not block later callers
+    flights.stream("key", func)
+    assert list(flights.stream("key", func)) == ["item"]
+    assert not flights._calls # pylint: disable=protected-access
+
+
+def test_closed_leader_hands_the_call_to_the_followers():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    leader = flights.stream("key", produce, started, release, [1, 2, 3])
+    thread = threading.Thread(target=lambda: next(leader))
+    thread.start()
+    started.wait(5)
+    follower = flights.stream("key", produce, started, release, [], deadline = Deadline(5))
+    waiting = threading.Thread(target=lambda: items.extend(follower))
+    items = []
+    waiting.start()
+    call = flights._calls["key"] # pylint: disable=protected-access
+    while not call.followers:
+        time.sleep(0.01)
+
+    release.set()
+    thread.join(5)
+    # the leader's client disconnects while the follower is still waiting
+    leader.close()
+    waiting.join(5)
+
+    assert items == [1, 2, 3]
+    assert not flights._calls # pylint: disable=protected-access
+
+
+def test_closed_leader_without_followers_releases_the_key():
+    flights = SingleFlight()
+    closed = []
+
+    def func():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(1)
+
+    leader = flights.stream("key", func)
+    assert next(leader) == 1
+    leader.close()
+
+    assert closed == [1]
+    assert not flights._calls # pylint: disable=protected-access
+    assert list(flights.stream("key", func)) == [1, 2]
+
+
+def test_leader_error_is_raised_to_the_followers():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def failing():
+        yield 1
+        gate.wait(5)
+        raise ValueError("failed")
+
+    leader = flights.stream("key", failing)
+    assert next(leader) == 1
+    follower = flights.stream("key", failing)
+    assert next(follower) == 1
+
+    gate.set()
+    with pytest.raises(ValueError):
+        next(leader)
+    with pytest.raises(ValueError):
+        next(follower)
+
+
+def test_follower_stops_waiting_at_its_deadline():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    leader = flights.stream("key", produce, started, release, [1])
+    thread = threading.Thread(target=lambda: list(leader))
+    thread.start()
+    started.wait(5)
+
+    follower = flights.stream("key", produce, started, release, [], deadline = Deadline(0.1))
+    with pytest.raises(TimeoutError):
+        next(follower)
+
+    release.set()
+    thread.join(5)
+    assert not flights._calls # pylint: disable=protected-access
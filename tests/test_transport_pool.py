@@ -0,0 +1,44 @@
+import requests
+
+from transport_pool import TransportPool
+
+
+def pool_of(size):
+    pool = TransportPool()
+    pool.configure({"transport_pool_size": size})
+    return pool
+
+
+def test_eviction_keeps_transports_in_use():
+    pool = pool_of(1)
+    busy = requests.Session()
+    pool.mount(busy, "busy")
+    busy_adapter = busy.adapters["https://busy/"]
+
+    other = requests.Session()
+    pool.mount(other, "other")
+    assert len(pool) == 2
+    assert pool._transports["busy"].adapter is busy_adapter
+
+    pool.release(busy, "busy")
+    pool.release(other, "other")
+    pool.mount(requests.Session(), "third")
+    assert len(pool) == 1
+    assert list(pool._transports) == ["third"]
+
+
+def test_handshakes_are_counted_per_opened_connection():
+    pool = pool_of(4)
+    session = requests.Session()
+    pool.mount(session, "bmc")
+    connections = session.adapters["https://bmc/"].poolmanager.connection_from_url("https://bmc/")
+    connections._new_conn()
+    connections._new_conn()
+    pool.count_request("bmc")
+    pool.count_request("bmc")
+    pool.count_request("bmc")
+
+    stats = pool.stats("bmc")
+    assert stats["handshakes"] == 2
+    assert stats["requests"] == 3
+    assert stats["handshakes_avoided"] == 1
@@ -0,0 +1,188 @@
+"""Process-wide pool of the HTTPS connections to the BMCs, kept alive across scrapes."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPSConnectionPool
+
+
+class CountingConnectionPool(HTTPSConnectionPool):
+    """urllib3 connection pool calling on_connect for every connection it opens."""
+
+    def __init__(self, *args, on_connect=None, **kwargs):
+        self._on_connect = on_connect
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        if self._on_connect:
+            self._on_connect()
+        return super()._new_conn()
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTPAdapter counting the requests to one target and the connections it opens for them."""
+
+    def __init__(self, target, pool, max_per_host):
+        self._target = target
+        self._pool = pool
+        super().__init__(pool_connections=1, pool_maxsize=max_per_host)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme,
+            "https": partial(CountingConnectionPool, on_connect=partial(self._pool.count_handshake, self._target)),
+        }
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        try:
+            return super().send(request, stream, timeout, verify, cert, proxies)
+        finally:
+            self._pool.count_request(self._target)
+
+
+class PooledTransport:
+    """The connections to one target owned by the pool."""
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.users = 0
+        self.last_used = time.time()
+
+
+class TransportPool:
+    """
+    Keeps the keep-alive connections of the targets open across scrapes, so
+    that a scrape sends its requests over the connections of the previous one
+    instead of paying a TCP and TLS handshake with the BMC again.
+
+    Every target gets a requests HTTPAdapter which is mounted on the session of
+    each scrape and unmounted before the session is closed. At most
+    transport_max_per_host idle connections per target are kept. The transports
+    of at most transport_pool_size targets are kept, the least recently used one
+    is closed when another target is added, unless a scrape is still using it.
+    Transports that were not used for transport_idle_timeout seconds are closed.
+    """
+
+    def __init__(self):
+        self.size = 256
+        self.idle_timeout = 300
+        self.max_per_host = 10
+        self._transports = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """Apply the settings from the config file."""
+        self.size = int(config.get("transport_pool_size", 256))
+        self.idle_timeout = int(config.get("transport_idle_timeout", 300))
+        self.max_per_host = int(config.get("transport_max_per_host", 10))
+        logging.info(
+            "Transport pool of %s targets, %s connections per target, idle timeout %s seconds",
+            self.size, self.max_per_host, self.idle_timeout
+        )
+
+    @property
+    def enabled(self):
+        """Check if connections are kept across scrapes."""
+        return self.size > 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._transports)
+
+    def mount(self, session, target):
+        """Mount the pooled transport of target on a requests session."""
+        with self._lock:
+            closed = self._pop_idle()
+            transport = self._transports.get(target)
+            if transport:
+                self._transports.move_to_end(target)
+                self._count(target, "hits")
+            else:
+                transport = PooledTransport(TransportAdapter(target, self, self.max_per_host))
+                self._transports[target] = transport
+                self._count(target, "misses")
+            transport.users += 1
+            transport.last_used = time.time()
+            closed.extend(self._pop_least_recently_used())
+
+        for idle in closed:
+            idle.adapter.close()
+        session.mount(f"https://{target}/", transport.adapter)
+
+    def release(self, session, target):
+        """Unmount the pooled transport of target from a session before it is closed."""
+        adapter = session.adapters.pop(f"https://{target}/", None)
+        with self._lock:
+            transport = self._transports.get(target)
+            if transport and transport.adapter is adapter:
+                transport.users -= 1
+                transport.last_used = time.time()
+
+    def count_request(self, target):
+        """Count a request to target."""
+        with self._lock:
+            self._count(target, "requests")
+
+    def count_handshake(self, target):
+        """Count a connection opened to target."""
+        with self._lock:
+            self._count(target, "handshakes")
+
+    def stats(self, target):
+        """Return the counters of target."""
+        with self._lock:
+            return _with_avoided(dict(self._stats.get(target, _new_stats())))
+
+    def totals(self):
+        """Return the counters summed over all targets."""
+        totals = _new_stats()
+        with self._lock:
+            for stats in self._stats.values():
+                for counter, value in stats.items():
+                    totals[counter] += value
+        return _with_avoided(totals)
+
+    def close_all(self):
+        """Close all pooled connections, used at shutdown."""
+        with self._lock:
+            transports = list(self._transports.values())
+            self._transports.clear()
+
+        for transport in transports:
+            transport.adapter.close()
+
+    def _count(self, target, counter, value=1):
+        stats = self._stats.setdefault(target, _new_stats())
+        stats[counter] += value
+
+    def _pop_idle(self):
+        now = time.time()
+        idle = [
+            target for target, transport in self._transports.items()
+            if not transport.users and now - transport.last_used > self.idle_timeout
+        ]
+        return [self._transports.pop(target) for target in idle]
+
+    def _pop_least_recently_used(self):
+        # transports with requests in flight are kept, the pool shrinks once they are released
+        unused = [target for target, transport in self._transports.items() if not transport.users]
+        excess = len(self._transports) - self.size
+        return [self._transports.pop(target) for target in unused[:max(excess, 0)]]
+
+
+def _new_stats():
+    return {"hits": 0, "misses": 0, "requests": 0, "handshakes": 0}
+
+
+def _with_avoided(stats):
+    # every request that did not open a connection was sent over a kept-alive one
+    stats["handshakes_avoided"] = max(stats["requests"] - stats["handshakes"], 0)
+    return stats
+
+
+TRANSPORT_POOL = TransportPool()